@@ -5,39 +5,63 @@ A collection of custom nodes for ComfyUI focused on KPU utilities.
 
 from .nodes import (
     KPUExampleNode,
+    KPUExampleListNode,
     WailustriousPromptGenerator,
     WailustriousPromptBuilder,
     WailustriousCharacterBuilder,
     WailustriousMultiCharacterGenerator,
-    KPUSceneGenerator
+    WailustriousFusedScene,
+    KPUSceneGenerator,
+    KPUFrameSequenceLoader,
+    KPUFrameSequenceGrayscale,
+    KPUProfilerReport,
+    KPUPromptDedup,
 )
 
 # Required by ComfyUI to recognize custom nodes
 NODE_CLASS_MAPPINGS = {
     "KPUExampleNode": KPUExampleNode,
+    "KPUExampleListNode": KPUExampleListNode,
     "WailustriousPromptGenerator": WailustriousPromptGenerator,
     "WailustriousPromptBuilder": WailustriousPromptBuilder,
     "WailustriousCharacterBuilder": WailustriousCharacterBuilder,
     "WailustriousMultiCharacterGenerator": WailustriousMultiCharacterGenerator,
+    "WailustriousFusedScene": WailustriousFusedScene,
     "KPUSceneGenerator": KPUSceneGenerator,
+    "KPUFrameSequenceLoader": KPUFrameSequenceLoader,
+    "KPUFrameSequenceGrayscale": KPUFrameSequenceGrayscale,
+    "KPUProfilerReport": KPUProfilerReport,
+    "KPUPromptDedup": KPUPromptDedup,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
     "KPUExampleNode": "KPU Example (Grayscale)",
+    "KPUExampleListNode": "KPU Example (Grayscale, Image List)",
     "WailustriousPromptGenerator": "KPU Wailustrious Prompt Generator",
     "WailustriousPromptBuilder": "KPU Wailustrious Prompt Builder (Presets)",
     "WailustriousCharacterBuilder": "KPU Wailustrious Character Builder",
     "WailustriousMultiCharacterGenerator": "KPU Wailustrious Multi-Character Scene",
+    "WailustriousFusedScene": "KPU Wailustrious Fused Scene (5 Characters)",
     "KPUSceneGenerator": "KPU Scene Generator",
+    "KPUFrameSequenceLoader": "KPU Frame Sequence Loader (mmap)",
+    "KPUFrameSequenceGrayscale": "KPU Frame Sequence Grayscale (mmap)",
+    "KPUProfilerReport": "KPU Profiler Report",
+    "KPUPromptDedup": "KPU Prompt Dedup (MinHash)",
 }
 
 __all__ = [
     "KPUExampleNode",
+    "KPUExampleListNode",
     "WailustriousPromptGenerator",
     "WailustriousPromptBuilder",
     "WailustriousCharacterBuilder",
     "WailustriousMultiCharacterGenerator",
+    "WailustriousFusedScene",
     "KPUSceneGenerator",
+    "KPUFrameSequenceLoader",
+    "KPUFrameSequenceGrayscale",
+    "KPUProfilerReport",
+    "KPUPromptDedup",
     "NODE_CLASS_MAPPINGS",
     "NODE_DISPLAY_NAME_MAPPINGS",
 ]
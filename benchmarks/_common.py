@@ -0,0 +1,37 @@
+"""Shared helpers for the benchmark scripts.
+
+The repository is a ComfyUI custom-node package with relative imports, so
+the scripts load it under a fixed module name instead of relying on the
+checkout directory name.
+"""
+import importlib.util
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+PACKAGE = "kpu_utils"
+
+
+def load_package() -> Any:
+    """Import the repository root as the `kpu_utils` package."""
+    if PACKAGE in sys.modules:
+        return sys.modules[PACKAGE]
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE, ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def best_of(func: Callable[[], Any], repeat: int = 5) -> Tuple[float, Any]:
+    """Return (best wall time in seconds, last result) over `repeat` runs."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
@@ -0,0 +1,126 @@
+"""Benchmark the fused scene node against the chained Wailustrious graph.
+
+The chained graph is five Character Builder nodes feeding one
+Multi-Character Scene node; the fused graph is one Fused Scene node.  Two
+queues are timed: every item with new random characters, and fixed
+characters with only the location changing per item.  Both graphs must
+produce byte-identical outputs.
+
+Two rows per graph:
+    - direct: the node functions called back to back
+    - executor: each node also goes through a small stand-in for the
+      ComfyUI executor (input-signature hashing over its inputs and the
+      upstream signatures, output cache store), which is the per-node
+      overhead the fused node saves
+
+Usage: python benchmarks/bench_fused_scene.py [items]
+"""
+import hashlib
+import random
+import sys
+import time
+
+from _common import load_package
+
+SCENE = {
+    "lighting": "soft lighting",
+    "time_of_day": "daytime",
+    "camera_angle": "wide shot",
+    "art_style": "anime",
+    "quality_tags": "high quality, masterpiece, detailed",
+    "composition": "side by side",
+}
+
+
+def random_characters(package, rng: random.Random):
+    inputs = package.WailustriousCharacterBuilder.INPUT_TYPES()["required"]
+    characters = []
+    for _ in range(5):
+        fields = {}
+        for name, spec in inputs.items():
+            choices = spec[0]
+            fields[name] = rng.choice(choices) if isinstance(choices, list) else rng.choice(["", "glasses, ribbon", "freckles"])
+        fields["special_traits"] = rng.choice(["", "hair ornament", "cat ears, tail"])
+        characters.append(fields)
+    return characters
+
+
+def spec_lines(characters) -> str:
+    return "\n".join("; ".join(f"{name}={value}" for name, value in fields.items()) for fields in characters)
+
+
+def signature(class_type: str, inputs, upstream) -> str:
+    """Stand-in for the executor's cache key: hash of inputs plus upstream keys."""
+    parts = [class_type] + [f"{name}={value!r}" for name, value in sorted(inputs.items())] + list(upstream)
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class Executor:
+    """Runs nodes with signature hashing and an output cache, like a queue item would."""
+
+    def __init__(self) -> None:
+        self.cache = {}
+
+    def run(self, node, inputs, links=None):
+        """Run `node`; `links` maps input names to (upstream key, upstream value)."""
+        links = links or {}
+        key = signature(type(node).__name__, inputs, [upstream for upstream, _ in links.values()])
+        outputs = self.cache.get(key)
+        if outputs is None:
+            kwargs = dict(inputs, **{name: value for name, (_, value) in links.items()})
+            outputs = getattr(node, node.FUNCTION)(**kwargs)
+            self.cache[key] = outputs
+        return key, outputs
+
+
+def chained(package, characters, location, executor=None):
+    builder = package.WailustriousCharacterBuilder()
+    scene = package.WailustriousMultiCharacterGenerator()
+    inputs = dict(SCENE, location=location, character_1_desc="", character_1_type="girl")
+    if executor is None:
+        records = {f"character_{slot}": builder.build(**fields)[2] for slot, fields in enumerate(characters, 1)}
+        return scene.generate(**inputs, **records)
+    links = {}
+    for slot, fields in enumerate(characters, 1):
+        key, outputs = executor.run(builder, fields)
+        links[f"character_{slot}"] = (key, outputs[2])
+    return executor.run(scene, inputs, links)[1]
+
+
+def fused(package, specs, location, executor=None):
+    node = package.WailustriousFusedScene()
+    inputs = dict(SCENE, location=location, characters=specs)
+    if executor is None:
+        return node.generate(**inputs)
+    return executor.run(node, inputs)[1]
+
+
+def main() -> None:
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    package = load_package()
+    rng = random.Random(0)
+    locations = ["classroom", "beach", "forest", "city street", "bedroom", "castle"]
+    fixed = random_characters(package, rng)
+    queues = {
+        "new characters": [(random_characters(package, rng), rng.choice(locations)) for _ in range(items)],
+        "fixed characters": [(fixed, f"{rng.choice(locations)} {i}") for i in range(items)],
+    }
+
+    for title, queue in queues.items():
+        # The fused node's widget holds the same fields as one spec line per character
+        spec_queue = [(spec_lines(characters), location) for characters, location in queue]
+        for (characters, location), (specs, _) in zip(queue, spec_queue):
+            assert chained(package, characters, location) == fused(package, specs, location)
+        print(f"[{title}] {items} queue items, outputs byte-identical")
+
+        for label, use_executor in (("direct", False), ("executor", True)):
+            for name, graph, inputs in (("chained", chained, queue), ("fused", fused, spec_queue)):
+                executor = Executor() if use_executor else None
+                start = time.perf_counter()
+                for fields, location in inputs:
+                    graph(package, fields, location, executor)
+                elapsed = time.perf_counter() - start
+                print(f"  {label:8} {name:7}: {elapsed / items * 1e6:8.1f} us/item")
+
+if __name__ == "__main__":
+    main()
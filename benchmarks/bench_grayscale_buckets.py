@@ -0,0 +1,66 @@
+"""Benchmark bucketed batching of mixed-size images against per-image calls.
+
+Converts a list of thumbnails in a handful of resolutions, either one
+kernel call per image or with ``grayscale_bucketed`` (one call per shape
+bucket), and checks that both give the same pixels.  The node rows compare
+one ``KPUExampleNode.process`` call per image (what ComfyUI does for list
+inputs) with a single ``KPUExampleListNode.process_list`` call; node log
+output is discarded.
+
+Usage: python benchmarks/bench_grayscale_buckets.py [count]
+"""
+import contextlib
+import io
+import sys
+
+from _common import best_of, load_package
+
+SIZE_SETS = {
+    "small": [(32, 32), (48, 32), (32, 48), (64, 48), (48, 64), (64, 64), (80, 60), (60, 80)],
+    "medium": [(64, 64), (96, 64), (64, 96), (128, 96), (96, 128), (128, 128), (160, 120), (120, 160)],
+}
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    package = load_package()
+    import torch
+    from kpu_utils.utils.grayscale import grayscale_bucketed, grayscale_tensor
+
+    torch.manual_seed(0)
+    print(f"{count} images per set, torch threads={torch.get_num_threads()}")
+    for name, sizes in SIZE_SETS.items():
+        images = [torch.rand(1, *sizes[i % len(sizes)], 3) for i in range(count)]
+
+        def per_image():
+            return [grayscale_tensor(image)[0] for image in images]
+
+        def bucketed():
+            return [result[0] for result in grayscale_bucketed(images)]
+
+        node, list_node = package.KPUExampleNode(), package.KPUExampleListNode()
+
+        def node_per_image():
+            with contextlib.redirect_stdout(io.StringIO()):
+                return [node.process(image)[0] for image in images]
+
+        def node_list():
+            with contextlib.redirect_stdout(io.StringIO()):
+                return list_node.process_list(images)[0]
+
+        single_s, single = best_of(per_image)
+        bucket_s, buckets = best_of(bucketed)
+        node_s, _ = best_of(node_per_image)
+        list_s, _ = best_of(node_list)
+        assert all(torch.equal(a, b) for a, b in zip(single, buckets))
+
+        print(f"[{name}: {sizes[0]}..{sizes[-1]}, {len(sizes)} shapes]")
+        print(f"  per-image : {single_s * 1e3:8.1f} ms  ({single_s / count * 1e6:.1f} us/image)")
+        print(f"  bucketed  : {bucket_s * 1e3:8.1f} ms  ({bucket_s / count * 1e6:.1f} us/image)")
+        print(f"  speedup   : {single_s / bucket_s:8.2f}x")
+        print(f"  node/item : {node_s * 1e3:8.1f} ms")
+        print(f"  list node : {list_s * 1e3:8.1f} ms  ({node_s / list_s:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark the grayscale kernel across input and compute dtypes.
+
+Each case runs in a fresh subprocess so the reported peak RSS belongs to
+that case alone.  Error is the max absolute difference from a float64
+reference computed from the same (already quantized) input.
+
+Usage: python benchmarks/bench_grayscale_dtype.py [batch] [size]
+"""
+import json
+import resource
+import subprocess
+import sys
+
+CASES = [
+    ("float32", "auto", 0),
+    ("float16", "float16", 0),
+    ("float16", "auto", 0),
+    ("float16", "auto", 8),
+    ("bfloat16", "auto", 8),
+]
+
+
+def run_case(dtype: str, compute: str, chunk: int, batch: int, size: int) -> dict:
+    from _common import best_of, load_package
+    import torch
+
+    load_package()
+    from kpu_utils.utils.grayscale import grayscale_tensor
+
+    torch.manual_seed(0)
+    image = torch.rand(batch, size, size, 3, dtype=getattr(torch, dtype))
+    compute_dtype = None if compute == "auto" else getattr(torch, compute)
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    seconds, (out, _, _) = best_of(
+        lambda: grayscale_tensor(image, compute_dtype=compute_dtype, chunk_size=chunk), repeat=3
+    )
+    reused = torch.empty_like(out)
+    reuse_seconds, _ = best_of(
+        lambda: grayscale_tensor(image, out=reused, compute_dtype=compute_dtype, chunk_size=chunk), repeat=3
+    )
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    ref = image.double()
+    ref = 0.299 * ref[..., 0] + 0.587 * ref[..., 1] + 0.114 * ref[..., 2]
+    return {
+        "dtype": dtype,
+        "compute": compute,
+        "chunk": chunk,
+        "ms": round(seconds * 1e3, 1),
+        "ms_out_reuse": round(reuse_seconds * 1e3, 1),
+        "output_mb": round(out.numel() * out.element_size() / 2**20, 1),
+        "peak_rss_delta_mb": round((peak_rss - base_rss) / 1024, 1),
+        "max_abs_err": float((out[..., 0].double() - ref).abs().max()),
+    }
+
+
+def main() -> None:
+    batch = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+    print(f"batch={batch} size={size}x{size}")
+    header = f"{'dtype':>9} {'compute':>8} {'chunk':>5} {'ms':>8} {'ms(out=)':>9} {'out MB':>7} {'peak dRSS MB':>12} {'max err':>9}"
+    print(header)
+    for dtype, compute, chunk in CASES:
+        cmd = [sys.executable, __file__, "--case", dtype, compute, str(chunk), str(batch), str(size)]
+        row = json.loads(subprocess.check_output(cmd, cwd=sys.path[0]).decode().strip().splitlines()[-1])
+        print(
+            f"{row['dtype']:>9} {row['compute']:>8} {row['chunk']:>5} {row['ms']:>8} {row['ms_out_reuse']:>9}"
+            f" {row['output_mb']:>7} {row['peak_rss_delta_mb']:>12} {row['max_abs_err']:>9.2e}"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--case":
+        dtype, compute, chunk, batch, size = sys.argv[2:7]
+        print(json.dumps(run_case(dtype, compute, int(chunk), int(batch), int(size))))
+    else:
+        main()
@@ -0,0 +1,83 @@
+"""Benchmark MinHash/LSH near-duplicate detection on generated prompt batches.
+
+Builds prompts from random Character Builder fields plus a few tags from a
+larger synthetic pool, then adds copies that only shuffle tag order or add
+one tag, and times ``dedup_prompts``.  Reports how many planted
+near-duplicates landed in their source's cluster, and how many originals
+were merged with another original.
+
+Usage: python benchmarks/bench_prompt_dedup.py [count]
+"""
+import random
+import sys
+import time
+
+from _common import load_package
+
+FIELDS = {
+    "hair_color": ["black", "white", "brown", "red", "pink", "purple", "blue", "green", "blonde", "silver"],
+    "hair_length": ["short hair", "shoulder-length hair", "long hair", "very long hair"],
+    "hair_style": ["straight hair", "wavy hair", "twintails", "ponytail", "braid", "hime cut"],
+    "eye_color": ["blue eyes", "red eyes", "green eyes", "yellow eyes", "purple eyes", "brown eyes"],
+    "body_type": ["slim", "slender", "petite", "curvy", "athletic"],
+    "clothing": ["school uniform", "maid outfit", "dress", "kimono", "armor", "casual clothes"],
+    "pose": ["standing", "sitting", "kneeling", "jumping", "running"],
+    "action": ["looking at viewer", "looking away", "profile", "from above"],
+    "expression": ["smiling", "neutral", "serious", "blushing", "embarrassed"],
+    "location": ["bedroom", "classroom", "forest", "beach", "city street", "castle"],
+}
+EXTRAS = ["glasses", "hair ribbon", "choker", "earrings", "hat", "scarf", "gloves", "thighhighs"]
+TAIL = ["anime", "high quality", "masterpiece", "detailed"]
+POOL = [f"tag{i}" for i in range(5000)]
+
+
+def make_prompts(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    originals = max(1, count // 2)
+    prompts = []
+    for _ in range(originals):
+        tags = ["1girl"] + [rng.choice(values) for values in FIELDS.values()]
+        tags += rng.sample(EXTRAS, 2) + rng.sample(POOL, 4) + TAIL
+        prompts.append(tags)
+    out = [", ".join(tags) for tags in prompts]
+    sources = list(range(originals))
+    # Planted near-duplicates: shuffled order, or one extra tag
+    for i in range(count - originals):
+        source = rng.randrange(originals)
+        sources.append(source)
+        tags = list(prompts[source])
+        if i % 2:
+            rng.shuffle(tags)
+        else:
+            tags.append(rng.choice(EXTRAS))
+        out.append(", ".join(tags))
+    return out, sources, originals
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    load_package()
+    import numpy as np
+    from kpu_utils.utils.prompt_dedup import cluster_prompts, dedup_prompts
+
+    start = time.perf_counter()
+    prompts, sources, originals = make_prompts(count)
+    print(f"generated {len(prompts)} prompts in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    kept, clusters = dedup_prompts(prompts, threshold=0.8)
+    elapsed = time.perf_counter() - start
+
+    print(f"dedup      : {elapsed:.2f} s ({elapsed / len(prompts) * 1e6:.2f} us/prompt)")
+    print(f"kept       : {len(kept)} (from {len(prompts)}, {originals} generated as originals)")
+    print(f"clusters   : {len(clusters)}")
+
+    labels = cluster_prompts(prompts, threshold=0.8)
+    planted = labels[originals:] == labels[np.asarray(sources[originals:])]
+    merged = originals - len(np.unique(labels[:originals]))
+    print(f"recall     : {planted.mean():.4f} of planted near-duplicates found")
+    print(f"merged     : {merged} originals merged into another original")
+
+
+if __name__ == "__main__":
+    main()
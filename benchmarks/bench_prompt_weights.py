@@ -0,0 +1,64 @@
+"""Benchmark the weighted-emphasis parser on long prompts.
+
+Times ``normalize_emphasis`` on generated prompts with thousands of
+weighted tokens (mixed ``(tag:w)``, nested ``((tag))``, ``[tag]`` and
+duplicates), plus two inputs that make ad-hoc regexes backtrack: deeply
+nested parentheses and an unclosed ``(`` followed by a long run of text.
+The last rows time such a regex on growing inputs for comparison.
+
+Usage: python benchmarks/bench_prompt_weights.py
+"""
+import random
+import re
+
+from _common import best_of, load_package
+
+SIZES = [1_000, 10_000, 100_000]
+# Typical hand-written pattern; the nested quantifier backtracks exponentially
+NAIVE = re.compile(r"\((?:[^():,]+,?)*:([\d.]+)\)")
+
+
+def make_prompt(tokens: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    vocab = [f"tag {i}" for i in range(max(1, tokens // 4))]
+    parts = []
+    for _ in range(tokens):
+        tag = rng.choice(vocab)
+        kind = rng.randrange(4)
+        if kind == 0:
+            parts.append(f"({tag}:{rng.uniform(0.5, 1.8):.2f})")
+        elif kind == 1:
+            parts.append("(" * rng.randint(1, 3) + tag + ")" * rng.randint(1, 3))
+        elif kind == 2:
+            parts.append(f"[{tag}]")
+        else:
+            parts.append(tag)
+    return ", ".join(parts)
+
+
+def main() -> None:
+    load_package()
+    from kpu_utils.utils.prompt_weights import normalize_emphasis
+
+    for tokens in SIZES:
+        prompt = make_prompt(tokens)
+        seconds, result = best_of(lambda: normalize_emphasis(prompt, "max"))
+        assert normalize_emphasis(result, "max") == result
+        print(f"{tokens:>7} tokens : {seconds * 1e3:8.2f} ms  ({seconds / tokens * 1e6:.2f} us/token)")
+
+    depth = 100_000
+    nested = "(" * depth + "tag" + ")" * depth
+    seconds, _ = best_of(lambda: normalize_emphasis(nested), repeat=3)
+    print(f"nested {depth} : {seconds * 1e3:8.2f} ms")
+    unclosed = "(" + "a, b " * 20_000
+    seconds, _ = best_of(lambda: normalize_emphasis(unclosed), repeat=3)
+    print(f"unclosed {len(unclosed)} chars : {seconds * 1e3:8.2f} ms")
+
+    for count in (10, 12, 14, 16, 18):
+        text = "(" + "a, " * count + "b"
+        seconds, _ = best_of(lambda: NAIVE.search(text), repeat=1)
+        print(f"ad-hoc regex, unclosed {len(text):>3} chars : {seconds * 1e3:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
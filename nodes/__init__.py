@@ -1,19 +1,29 @@
 """Package exporting ComfyUI nodes for comfyui-kpu-utils."""
 
-from .kpu_example import KPUExampleNode
+from .kpu_example import KPUExampleNode, KPUExampleListNode
 from .wailustrious_prompt_generator import (
     WailustriousPromptGenerator,
     WailustriousPromptBuilder,
 )
 from .wailustrious_character_builder import WailustriousCharacterBuilder
 from .wailustrious_multi_character import WailustriousMultiCharacterGenerator
+from .wailustrious_fused_scene import WailustriousFusedScene
 from .kpu_scene_generator import KPUSceneGenerator
+from .kpu_frame_sequence import KPUFrameSequenceLoader, KPUFrameSequenceGrayscale
+from .kpu_profiler_report import KPUProfilerReport
+from .kpu_prompt_dedup import KPUPromptDedup
 
 __all__ = [
     "KPUExampleNode",
+    "KPUExampleListNode",
     "WailustriousPromptGenerator",
     "WailustriousPromptBuilder",
     "WailustriousCharacterBuilder",
     "WailustriousMultiCharacterGenerator",
+    "WailustriousFusedScene",
     "KPUSceneGenerator",
+    "KPUFrameSequenceLoader",
+    "KPUFrameSequenceGrayscale",
+    "KPUProfilerReport",
+    "KPUPromptDedup",
 ]
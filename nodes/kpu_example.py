@@ -2,113 +2,398 @@
 
 This file defines a minimal, functional ComfyUI-style node class
 that converts images to grayscale. Handles PyTorch tensors, numpy arrays,
-and PIL Images.
+and PIL Images, keeping alpha (RGBA or a separate ComfyUI MASK) in the
+same output buffer.
 """
-from typing import Any, Dict
-from PIL import Image
+import json
+from typing import Any, Callable, Dict, List, Tuple
+from PIL import Image, ImageChops
 import numpy as np
 
+from ..utils.frame_cache import FrameCache, frame_digest
+from ..utils.grayscale import grayscale_array, grayscale_bucketed, grayscale_tensor, split_channels
+from ..utils.profiling import profile_node
+
 try:
     import torch
     HAS_TORCH = True
 except ImportError:
     HAS_TORCH = False
 
+# Shared across node instances so repeated frames hit across queue items
+_FRAME_CACHE = FrameCache()
+
 
+@profile_node
 class KPUExampleNode:
     """A minimal example ComfyUI node that converts images to grayscale.
 
-    - Accepts one `IMAGE` input (PIL.Image or numpy array).
-    - Returns a grayscale image of the same type as the input.
+    - Accepts one `IMAGE` input (PIL.Image or numpy array) and an optional `MASK`.
+    - Returns a grayscale image of the same type as the input, plus a `MASK`.
     """
 
     @classmethod
     def INPUT_TYPES(cls) -> Dict[str, Dict[str, Any]]:
-        return {"required": {"image": ("IMAGE",)}}
+        return {
+            "required": {"image": ("IMAGE",)},
+            "optional": {
+                "mask": ("MASK",),  # ComfyUI mask (1 - alpha), used as alpha for RGB input
+                "keep_alpha": ("BOOLEAN", {"default": True}),
+                "luminance_mask": ("BOOLEAN", {"default": False}),  # Output luminance as MASK
+                # Per-frame result cache keyed by content hash (opt-in)
+                "use_cache": ("BOOLEAN", {"default": False}),
+                "cache_budget_mb": ("INT", {"default": 512, "min": 0, "max": 65536}),
+                "cache_spill_dir": ("STRING", {"default": ""}),  # Spill evicted frames as kpu-<digest>.npy
+                "cache_spill_mb": ("INT", {"default": 4096, "min": 0, "max": 1048576}),  # Disk budget for spilled frames
+                # Accumulation precision; "auto" uses float32 for float16/bfloat16 input
+                "compute_dtype": (["auto", "float32", "float16", "bfloat16"], {"default": "auto"}),
+                "chunk_size": ("INT", {"default": 16, "min": 0, "max": 4096}),  # Frames per chunk, 0 = whole batch
+            },
+        }
 
-    RETURN_TYPES = ("IMAGE",)
+    RETURN_TYPES = ("IMAGE", "MASK", "STRING")
+    RETURN_NAMES = ("image", "mask", "cache_stats")
     FUNCTION = "process"
     CATEGORY = "KPU Utils"
 
-    def process(self, image: Any):
+    def process(
+        self,
+        image: Any,
+        mask: Any = None,
+        keep_alpha: bool = True,
+        luminance_mask: bool = False,
+        use_cache: bool = False,
+        cache_budget_mb: int = 512,
+        cache_spill_dir: str = "",
+        cache_spill_mb: int = 4096,
+        compute_dtype: str = "auto",
+        chunk_size: int = 16,
+    ):
         """Convert `image` to grayscale (replicated to 3 channels for compatibility).
 
         Handles:
-        - PyTorch tensors (batch, height, width, 3) -> (batch, height, width, 3) with R=G=B
-        - numpy arrays (height, width, 3) -> (height, width, 3) with R=G=B
+        - PyTorch tensors (batch, height, width, 3|4) -> same shape with R=G=B, alpha kept
+        - numpy arrays (height, width, C) -> (height, width, 3|4) with R=G=B, alpha kept
         - PIL Image
+
+        The returned mask is the luminance plane when `luminance_mask` is set,
+        otherwise the input `mask` unchanged, otherwise `1 - alpha` (ComfyUI
+        convention), otherwise an empty mask.
+
+        With `use_cache`, batches are processed frame by frame against a
+        shared content-hash cache and only missing frames are recomputed
+        (CPU tensors and numpy batches without a separate `mask`). Frames
+        spilled to `cache_spill_dir` are capped at `cache_spill_mb`, oldest
+        deleted first.
+
+        Tensors keep their dtype: float16/bfloat16 input is accumulated in
+        `compute_dtype` one chunk of `chunk_size` frames at a time and stored
+        back in the input dtype.
+
+        A list of images is grouped into shape buckets and each bucket is
+        converted with a single kernel call; lists of images and masks are
+        returned in the original order (`mask` and the cache are not used).
         """
+        if use_cache:
+            _FRAME_CACHE.configure(
+                cache_budget_mb * 1024 * 1024, cache_spill_dir, cache_spill_mb * 1024 * 1024
+            )
+        stats = json.dumps(_FRAME_CACHE.stats())
         try:
+            # List of images, possibly of different sizes
+            if isinstance(image, (list, tuple)):
+                return self._process_list(
+                    list(image), keep_alpha, luminance_mask, compute_dtype, chunk_size, stats
+                )
+
             # PyTorch tensor (most common in ComfyUI)
             if HAS_TORCH and isinstance(image, torch.Tensor):
                 # Assume shape (batch, height, width, channels) with float [0, 1]
                 print(f"[KPUExampleNode] Input tensor shape: {image.shape}, dtype: {image.dtype}")
-                
-                # Convert RGB to grayscale using standard formula
-                # gray = 0.299*R + 0.587*G + 0.114*B
-                if image.shape[-1] >= 3:  # RGB or RGBA
-                    gray = (0.299 * image[..., 0] + 
-                            0.587 * image[..., 1] + 
-                            0.114 * image[..., 2])
+                mask = self._check_mask(mask, image.shape[-3:-1])
+
+                if use_cache and mask is None and self._cacheable_tensor(image):
+                    work_dtype = self._torch_dtype(compute_dtype)
+
+                    def kernel(batch: np.ndarray) -> np.ndarray:
+                        return grayscale_tensor(
+                            torch.from_numpy(batch),
+                            keep_alpha=keep_alpha,
+                            compute_dtype=work_dtype,
+                            chunk_size=chunk_size,
+                        )[0].numpy()
+
+                    out_np = self._grayscale_cached(image.numpy(), keep_alpha, kernel, "tensor", compute_dtype)
+                    out, alpha = torch.from_numpy(out_np), self._alpha_view(image)
+                    gray = out[..., 0].contiguous()
+                    stats = json.dumps(_FRAME_CACHE.stats())
                 else:
-                    gray = image[..., 0]  # Already single channel
-                
-                # Replicate gray to 3 channels (R=G=B) for compatibility
-                # Stack along last dimension: (batch, height, width) -> (batch, height, width, 3)
-                gray_3ch = torch.stack([gray, gray, gray], dim=-1)
-                print(f"[KPUExampleNode] Output tensor shape: {gray_3ch.shape}")
-                return (gray_3ch,)
-            
+                    out, gray, alpha = grayscale_tensor(
+                        image,
+                        keep_alpha=keep_alpha,
+                        mask=mask,
+                        compute_dtype=self._torch_dtype(compute_dtype),
+                        chunk_size=chunk_size,
+                    )
+
+                out_mask = self._output_mask(out, gray, alpha, mask, luminance_mask)
+                print(f"[KPUExampleNode] Output tensor shape: {out.shape}")
+                return (out, out_mask, stats)
+
             # PIL Image -> return PIL grayscale
             if isinstance(image, Image.Image):
                 gray_pil = image.convert("L")
-                # Convert back to RGB to keep 3 channels
-                rgb_pil = Image.new("RGB", gray_pil.size)
-                rgb_pil.paste(gray_pil)
-                return (rgb_pil,)
+                alpha_pil = image.getchannel("A") if image.mode in ("RGBA", "LA") else None
+                mask_alpha = self._pil_mask_alpha(mask, gray_pil.size)
+                if mask_alpha is None:
+                    mask = None
+                elif alpha_pil is None:
+                    # No alpha channel of its own: the MASK becomes the alpha, as for tensors
+                    alpha_pil = mask_alpha
+                if keep_alpha and alpha_pil is not None:
+                    out_pil = Image.merge("RGBA", (gray_pil, gray_pil, gray_pil, alpha_pil))
+                else:
+                    # Convert back to RGB to keep 3 channels
+                    out_pil = Image.merge("RGB", (gray_pil, gray_pil, gray_pil))
+
+                if luminance_mask:
+                    out_mask = gray_pil
+                elif mask is not None:
+                    out_mask = mask
+                elif alpha_pil is not None:
+                    out_mask = ImageChops.invert(alpha_pil)
+                else:
+                    out_mask = Image.new("L", gray_pil.size, 0)
+                return (out_pil, out_mask, stats)
 
             # numpy array
             if isinstance(image, np.ndarray):
                 print(f"[KPUExampleNode] Input numpy array shape: {image.shape}, dtype: {image.dtype}")
-                orig_dtype = image.dtype
-                
-                # Handle different shapes: (H,W,C) or (H,W)
-                if len(image.shape) == 3 and image.shape[-1] >= 3:
-                    # RGB/RGBA to grayscale
-                    if np.issubdtype(orig_dtype, np.floating):
-                        # Assume normalized [0, 1]
-                        gray = (0.299 * image[..., 0] + 
-                                0.587 * image[..., 1] + 
-                                0.114 * image[..., 2])
-                    else:
-                        # uint8 [0, 255]
-                        gray = (0.299 * image[..., 0] + 
-                                0.587 * image[..., 1] + 
-                                0.114 * image[..., 2]).astype(orig_dtype)
-                    
-                    # Replicate to 3 channels
-                    gray_3ch = np.stack([gray, gray, gray], axis=-1)
+                spatial = image.shape[:2] if image.ndim == 2 else image.shape[-3:-1]
+                mask = self._check_mask(mask, spatial)
+
+                if use_cache and mask is None and image.ndim == 4:
+                    out = self._grayscale_cached(
+                        image, keep_alpha, lambda batch: grayscale_array(batch, keep_alpha=keep_alpha)[0], "array"
+                    )
+                    gray, alpha = out[..., 0], self._alpha_view(image)
+                    stats = json.dumps(_FRAME_CACHE.stats())
                 else:
-                    # Already single channel, replicate to 3
-                    if len(image.shape) == 2:
-                        gray_3ch = np.stack([image, image, image], axis=-1)
-                    else:
-                        gray_3ch = image
-                
-                print(f"[KPUExampleNode] Output numpy array shape: {gray_3ch.shape}")
-                return (gray_3ch,)
+                    out, gray, alpha = grayscale_array(image, keep_alpha=keep_alpha, mask=mask)
+
+                out_mask = self._output_mask(out, gray, alpha, mask, luminance_mask)
+                print(f"[KPUExampleNode] Output numpy array shape: {out.shape}")
+                return (out, out_mask, stats)
 
             # Fallback: try to coerce to tensor or numpy
             if HAS_TORCH:
                 try:
                     tensor = torch.from_numpy(np.array(image))
-                    return self.process(tensor)
+                    return self.process(
+                        tensor, mask, keep_alpha, luminance_mask,
+                        use_cache, cache_budget_mb, cache_spill_dir, cache_spill_mb,
+                        compute_dtype, chunk_size,
+                    )
                 except Exception:
                     pass
-            
-            return (image,)
+
+            return (image, mask, stats)
         except Exception as e:
             print(f"[KPUExampleNode] Error in process: {e}")
             import traceback
             traceback.print_exc()
-            return (image,)
+            return (image, mask, stats)
+
+    def _process_list(
+        self,
+        images: List[Any],
+        keep_alpha: bool,
+        luminance_mask: bool,
+        compute_dtype: str,
+        chunk_size: int,
+        stats: str,
+    ) -> Tuple[List[Any], List[Any], str]:
+        """Convert a list of images, batching tensors/arrays by shape bucket."""
+        print(f"[KPUExampleNode] Input list of {len(images)} images")
+        batchable = [
+            i for i, item in enumerate(images)
+            if (isinstance(item, np.ndarray) or (HAS_TORCH and isinstance(item, torch.Tensor)))
+            and item.ndim in (3, 4)
+        ]
+        results = grayscale_bucketed(
+            [images[i] for i in batchable],
+            keep_alpha=keep_alpha,
+            compute_dtype=self._torch_dtype(compute_dtype) if HAS_TORCH else None,
+            chunk_size=chunk_size,
+        )
+
+        outs: List[Any] = [None] * len(images)
+        masks: List[Any] = [None] * len(images)
+        for i, (out, gray, alpha) in zip(batchable, results):
+            outs[i] = out
+            masks[i] = self._output_mask(out, gray, alpha, None, luminance_mask)
+
+        # PIL images and other inputs go through the single-image path
+        batched = set(batchable)
+        for i, item in enumerate(images):
+            if i not in batched:
+                outs[i], masks[i], _ = self.process(
+                    item, keep_alpha=keep_alpha, luminance_mask=luminance_mask,
+                    compute_dtype=compute_dtype, chunk_size=chunk_size,
+                )
+        return (outs, masks, stats)
+
+    @staticmethod
+    def _output_mask(out: Any, gray: Any, alpha: Any, mask: Any, luminance_mask: bool) -> Any:
+        """Pick the MASK output: luminance, the input mask, 1 - alpha, or empty.
+
+        Integer images are normalized by their dtype's maximum so the MASK
+        is always a float plane in [0, 1].
+        """
+        is_tensor = HAS_TORCH and isinstance(out, torch.Tensor)
+        if is_tensor:
+            integer = not out.dtype.is_floating_point
+            scale = float(torch.iinfo(out.dtype).max) if integer else 1.0
+            if luminance_mask:
+                return gray.to(torch.float32) / scale if integer else gray.contiguous()
+            if mask is not None:
+                return mask
+            if alpha is not None:
+                return 1.0 - alpha.to(torch.float32) / scale if integer else 1.0 - alpha
+            return torch.zeros(gray.shape, dtype=torch.float32 if integer else out.dtype, device=out.device)
+
+        integer = np.issubdtype(out.dtype, np.integer)
+        scale = float(np.iinfo(out.dtype).max) if integer else 1.0
+        if luminance_mask:
+            return np.divide(gray, scale, dtype=np.float32) if integer else gray
+        if mask is not None:
+            return mask
+        if alpha is not None:
+            return np.subtract(1.0, np.divide(alpha, scale, dtype=np.float32)) if integer else np.subtract(1.0, alpha)
+        return np.zeros(gray.shape, dtype=np.float32 if integer else out.dtype)
+
+    @staticmethod
+    def _check_mask(mask: Any, spatial: Any) -> Any:
+        """Return `mask` if its trailing (H, W) matches the image, else None."""
+        if mask is None:
+            return None
+        if tuple(mask.shape[-2:]) != tuple(spatial):
+            print(f"[KPUExampleNode] Ignoring mask with shape {tuple(mask.shape)}, image is {tuple(spatial)}")
+            return None
+        return mask
+
+    @classmethod
+    def _pil_mask_alpha(cls, mask: Any, size: Tuple[int, int]) -> Any:
+        """Turn a MASK (PIL, tensor or array) for a PIL image of `size` into an "L" alpha, or None."""
+        if mask is None:
+            return None
+        if isinstance(mask, Image.Image):
+            if mask.size != size:
+                print(f"[KPUExampleNode] Ignoring mask of size {mask.size}, image is {size}")
+                return None
+            return ImageChops.invert(mask.convert("L"))
+        if HAS_TORCH and isinstance(mask, torch.Tensor):
+            mask = mask.detach().cpu().float().numpy()
+        mask = cls._check_mask(np.asarray(mask), (size[1], size[0]))
+        if mask is None:
+            return None
+        # A batched mask uses its first item, matching the single PIL image
+        plane = mask.reshape(-1, size[1], size[0])[0].astype(np.float32)
+        return Image.fromarray(np.rint((1.0 - np.clip(plane, 0.0, 1.0)) * 255.0).astype(np.uint8), "L")
+
+    @staticmethod
+    def _torch_dtype(name: str) -> Any:
+        """Map a `compute_dtype` choice to a torch dtype (None for "auto")."""
+        if name == "auto":
+            return None
+        return getattr(torch, name)
+
+    @staticmethod
+    def _cacheable_tensor(image: Any) -> bool:
+        """Cached path hashes host memory through numpy views."""
+        return (
+            image.dim() == 4
+            and image.device.type == "cpu"
+            and image.dtype != torch.bfloat16
+            and not image.requires_grad
+        )
+
+    @staticmethod
+    def _alpha_view(image: Any) -> Any:
+        """Return a view of the alpha channel of a channel-last batch, or None."""
+        _, alpha_idx = split_channels(image.shape[-1])
+        return image[..., alpha_idx] if alpha_idx is not None else None
+
+    @staticmethod
+    def _grayscale_cached(
+        image: np.ndarray, keep_alpha: bool, kernel: Callable[[np.ndarray], np.ndarray], *params: Any
+    ) -> np.ndarray:
+        """Grayscale a (B, H, W, C) batch, recomputing only frames missing from the cache.
+
+        Misses go through `kernel` (the same kernel as the uncached path);
+        `params` identify the kernel settings in the cache key.
+        """
+        keys = [frame_digest(frame, "grayscale", keep_alpha, *params) for frame in image]
+        cached = [_FRAME_CACHE.get(key) for key in keys]
+        missing = [i for i, value in enumerate(cached) if value is None]
+
+        computed = None
+        if missing:
+            # Fancy indexing copies only the frames that must be recomputed
+            batch = image if len(missing) == len(image) else image[missing]
+            computed = kernel(batch)
+            for row, i in enumerate(missing):
+                _FRAME_CACHE.put(keys[i], computed[row])
+            if len(missing) == len(image):
+                return computed
+
+        sample = cached[0] if cached[0] is not None else computed[0]
+        out = np.empty((len(image),) + sample.shape, dtype=sample.dtype)
+        for i, value in enumerate(cached):
+            if value is not None:
+                out[i] = value
+        if computed is not None:
+            out[missing] = computed
+        return out
+
+
+@profile_node
+class KPUExampleListNode(KPUExampleNode):
+    """List-input variant of KPUExampleNode for mixed-resolution images.
+
+    ComfyUI hands the whole image list over in one call; images are
+    converted in shape buckets instead of one node execution per image.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls) -> Dict[str, Dict[str, Any]]:
+        return {
+            "required": {"image": ("IMAGE",)},
+            "optional": {
+                "keep_alpha": ("BOOLEAN", {"default": True}),
+                "luminance_mask": ("BOOLEAN", {"default": False}),  # Output luminance as MASK
+                "compute_dtype": (["auto", "float32", "float16", "bfloat16"], {"default": "auto"}),
+                "chunk_size": ("INT", {"default": 16, "min": 0, "max": 4096}),  # Frames per chunk, 0 = whole bucket
+            },
+        }
+
+    INPUT_IS_LIST = True
+    OUTPUT_IS_LIST = (True, True, False)
+    FUNCTION = "process_list"
+
+    def process_list(
+        self,
+        image: List[Any],
+        keep_alpha: List[bool] = [True],
+        luminance_mask: List[bool] = [False],
+        compute_dtype: List[str] = ["auto"],
+        chunk_size: List[int] = [16],
+    ):
+        """Convert every image in the list; widget values arrive as 1-item lists."""
+        return self.process(
+            list(image),
+            keep_alpha=keep_alpha[0],
+            luminance_mask=luminance_mask[0],
+            compute_dtype=compute_dtype[0],
+            chunk_size=chunk_size[0],
+        )
@@ -0,0 +1,172 @@
+"""KPU Frame Sequence nodes.
+
+Source/sink node pair for converting frame sequences that do not fit in
+memory. Frames are memory-mapped from local disk (``.npy`` or raw), run
+through the grayscale kernel in windows and written into a memory-mapped
+output file that can be loaded back with the same loader node.
+"""
+import os
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from ..utils.frames import create_frame_stack, open_frame_stack, stream_frames
+from ..utils.grayscale import grayscale_array, split_channels
+from ..utils.profiling import profile_node
+
+try:
+    import torch
+    HAS_TORCH = True
+except ImportError:
+    HAS_TORCH = False
+
+# With count = 0, a non-float32 stack is converted for the IMAGE only up to this size
+MAX_CONVERTED_MB = 1024
+
+
+@profile_node
+class KPUFrameSequenceLoader:
+    """Memory-map a frame stack from disk.
+
+    Returns the whole stack as a lazy `KPU_FRAMES` handle, plus the frames
+    `[start, start + count)` as an `IMAGE`. float32 stacks are wrapped
+    without copying, so nothing is read from disk until the frames are
+    used. Other dtypes are converted to float32 for the IMAGE window, which
+    is read at load time; with `count` 0 that window is capped at
+    MAX_CONVERTED_MB so a long uint8 sequence is never expanded in full.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls) -> Dict[str, Dict[str, Any]]:
+        return {
+            "required": {
+                "path": ("STRING", {"default": ""}),  # .npy or raw frame file
+                "start": ("INT", {"default": 0, "min": 0, "max": 0xFFFFFFFF}),
+                "count": ("INT", {"default": 1, "min": 0, "max": 0xFFFFFFFF}),  # 0 = all frames (capped unless float32)
+            },
+            "optional": {
+                # Raw files only (.npy carries its own header)
+                "raw_width": ("INT", {"default": 512, "min": 1, "max": 16384}),
+                "raw_height": ("INT", {"default": 512, "min": 1, "max": 16384}),
+                "raw_channels": ("INT", {"default": 3, "min": 1, "max": 4}),
+                "raw_dtype": (["uint8", "uint16", "float16", "float32"], {"default": "uint8"}),
+            }
+        }
+
+    RETURN_TYPES = ("KPU_FRAMES", "IMAGE", "INT")
+    RETURN_NAMES = ("frames", "image", "frame_count")
+    FUNCTION = "load"
+    CATEGORY = "KPU Utils"
+
+    @classmethod
+    def IS_CHANGED(cls, path: str, **kwargs: Any) -> str:
+        """Re-run when the file on disk changes."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return ""
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def load(
+        self,
+        path: str,
+        start: int,
+        count: int,
+        raw_width: int = 512,
+        raw_height: int = 512,
+        raw_channels: int = 3,
+        raw_dtype: str = "uint8",
+    ) -> Tuple[Any, Any, int]:
+        """Map `path` and slice the requested frames as an IMAGE."""
+        frames = open_frame_stack(path, (raw_height, raw_width, raw_channels), raw_dtype)
+        print(f"[KPUFrameSequenceLoader] Mapped {path}: shape {frames.shape}, dtype {frames.dtype}")
+
+        stop = len(frames) if count == 0 else min(start + count, len(frames))
+        if count == 0 and frames.dtype != np.float32 and stop > start:
+            frame_bytes = int(np.prod(frames.shape[1:])) * 4
+            limit = max(1, MAX_CONVERTED_MB * 1024 * 1024 // frame_bytes)
+            if stop - start > limit:
+                print(
+                    f"[KPUFrameSequenceLoader] {frames.dtype} stack: IMAGE limited to {limit} of "
+                    f"{stop - start} frames ({MAX_CONVERTED_MB} MB as float32); use the frames output for all"
+                )
+                stop = start + limit
+        image = self.frames_to_image(frames[start:stop])
+        return (frames, image, len(frames))
+
+    @staticmethod
+    def frames_to_image(frames: np.ndarray) -> Any:
+        """Expose a frame window as a float [0, 1] IMAGE.
+
+        float32 windows are wrapped without copying; other dtypes are
+        converted (and integer types normalized) for this window only.
+        """
+        if np.issubdtype(frames.dtype, np.integer):
+            image = np.multiply(frames, 1.0 / np.iinfo(frames.dtype).max, dtype=np.float32)
+        elif frames.dtype != np.float32:
+            image = frames.astype(np.float32)
+        else:
+            image = frames
+        if HAS_TORCH:
+            return torch.from_numpy(image)
+        return image
+
+
+@profile_node
+class KPUFrameSequenceGrayscale:
+    """Convert a mapped frame stack to grayscale into a mapped output file.
+
+    Frames are streamed in windows of `window` frames straight from the
+    source mapping into the output mapping, so memory use does not depend
+    on the sequence length.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls) -> Dict[str, Dict[str, Any]]:
+        return {
+            "required": {
+                "frames": ("KPU_FRAMES",),
+                "output_path": ("STRING", {"default": "output/frames_gray.npy"}),
+                "window": ("INT", {"default": 64, "min": 1, "max": 4096}),
+                "keep_alpha": ("BOOLEAN", {"default": True}),
+            }
+        }
+
+    RETURN_TYPES = ("KPU_FRAMES", "STRING")
+    RETURN_NAMES = ("frames", "output_path")
+    FUNCTION = "process"
+    CATEGORY = "KPU Utils"
+    OUTPUT_NODE = True
+
+    def process(
+        self,
+        frames: np.ndarray,
+        output_path: str,
+        window: int,
+        keep_alpha: bool,
+    ) -> Tuple[np.ndarray, str]:
+        """Stream `frames` through the grayscale kernel into `output_path`.
+
+        Raises:
+            ValueError: If `output_path` is the file `frames` is mapped from.
+        """
+        source = getattr(frames, "filename", None)
+        if source and os.path.realpath(output_path) == os.path.realpath(source):
+            raise ValueError(f"output_path {output_path} is the input frame file; choose another path")
+        _, alpha_idx = split_channels(frames.shape[-1])
+        channels = 4 if keep_alpha and alpha_idx is not None else 3
+        out_dir = os.path.dirname(output_path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+
+        dst = create_frame_stack(output_path, frames.shape[:-1] + (channels,), frames.dtype)
+        print(f"[KPUFrameSequenceGrayscale] Writing {dst.shape} {dst.dtype} to {output_path}")
+
+        def kernel(src_window: np.ndarray, dst_window: np.ndarray) -> None:
+            grayscale_array(src_window, keep_alpha=keep_alpha, out=dst_window)
+
+        stream_frames(frames, dst, kernel, window=window)
+        del dst
+
+        # Hand back a read-side mapping so downstream nodes slice it lazily
+        return (open_frame_stack(output_path, frames.shape[1:-1] + (channels,), frames.dtype.name), output_path)
@@ -0,0 +1,42 @@
+"""KPU Profiler Report Node.
+
+Dumps the per-node timing collected by ``utils.profiling`` as JSON.
+Profiling is enabled with the ``KPU_PROFILE`` environment variable.
+"""
+import json
+from typing import Any, Dict, Tuple
+
+from ..utils.profiling import PROFILER
+
+
+class KPUProfilerReport:
+    """Report aggregated wall/CPU time, allocations and payload sizes per node."""
+
+    @classmethod
+    def INPUT_TYPES(cls) -> Dict[str, Dict[str, Any]]:
+        return {
+            "required": {
+                "reset_after_report": ("BOOLEAN", {"default": False}),
+                "include_cprofile": ("BOOLEAN", {"default": True}),  # Slowest sampled cProfile reports
+            }
+        }
+
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("report",)
+    FUNCTION = "report"
+    CATEGORY = "KPU Utils"
+    OUTPUT_NODE = True
+
+    @classmethod
+    def IS_CHANGED(cls, **kwargs: Any) -> float:
+        """Always re-run: the report changes with every queue item."""
+        return float("nan")
+
+    def report(self, reset_after_report: bool, include_cprofile: bool = True) -> Tuple[str]:
+        """Return the profiler summary as an indented JSON string."""
+        summary = PROFILER.summary()
+        if not include_cprofile:
+            summary.pop("slowest_profiles", None)
+        if reset_after_report:
+            PROFILER.reset()
+        return (json.dumps(summary, indent=2),)
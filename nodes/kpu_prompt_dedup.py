@@ -0,0 +1,64 @@
+"""KPU Prompt Dedup Node.
+
+Drops near-duplicate prompts from a batch before they are rendered, using
+tag-level MinHash signatures and LSH (see ``utils.prompt_dedup``).
+"""
+import json
+from typing import Any, Dict, Tuple
+
+from ..utils.profiling import profile_node
+from ..utils.prompt_dedup import dedup_prompts
+
+
+@profile_node
+class KPUPromptDedup:
+    """Remove prompts whose tag sets are near-duplicates of an earlier prompt.
+
+    Takes one prompt per line. Tag order, case and extra whitespace are
+    ignored; prompts at or above `threshold` estimated Jaccard similarity are
+    clustered and only the first prompt of each cluster is kept.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls) -> Dict[str, Dict[str, Any]]:
+        return {
+            "required": {
+                "prompts": ("STRING", {"default": "", "multiline": True}),  # One prompt per line
+                "threshold": ("FLOAT", {"default": 0.8, "min": 0.0, "max": 1.0, "step": 0.01}),
+            },
+            "optional": {
+                "num_perm": ("INT", {"default": 64, "min": 8, "max": 512, "step": 8}),
+                "bands": ("INT", {"default": 0, "min": 0, "max": 512}),  # 0 = derive from threshold; snapped to a divisor of num_perm
+                "seed": ("INT", {"default": 0, "min": 0, "max": 0xFFFFFFFF}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "STRING", "INT")
+    RETURN_NAMES = ("unique_prompts", "clusters", "duplicates_removed")
+    FUNCTION = "dedup"
+    CATEGORY = "KPU Utils"
+
+    def dedup(
+        self,
+        prompts: str,
+        threshold: float,
+        num_perm: int = 64,
+        bands: int = 0,
+        seed: int = 0,
+    ) -> Tuple[str, str, int]:
+        """Deduplicate `prompts` (newline-separated).
+
+        Returns:
+            Tuple of (kept prompts joined by newlines, JSON list of clusters
+            as indices into the non-blank lines, number of prompts removed).
+        """
+        if bands > 0 and num_perm % bands:
+            # LSH needs equal-width bands; snap to the nearest divisor (smaller on ties)
+            snapped = min((d for d in range(1, num_perm + 1) if num_perm % d == 0), key=lambda d: (abs(d - bands), d))
+            print(f"[KPUPromptDedup] bands={bands} does not divide num_perm={num_perm}, using {snapped}")
+            bands = snapped
+        lines = [line for line in prompts.splitlines() if line.strip()]
+        kept, clusters = dedup_prompts(lines, threshold=threshold, num_perm=num_perm, bands=bands, seed=seed)
+        removed = len(lines) - len(kept)
+        print(f"[KPUPromptDedup] {len(lines)} prompts -> {len(kept)} kept, {len(clusters)} clusters")
+        return ("\n".join(kept), json.dumps(clusters), removed)
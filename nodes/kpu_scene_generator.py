@@ -4,7 +4,10 @@ Generates scene prompts based on numeric input for dynamic text fields."""
 
 from typing import Any, Dict, Tuple
 
+from ..utils.profiling import profile_node
 
+
+@profile_node
 class KPUSceneGenerator:
     """Generates scene prompts based on numeric input for dynamic text fields."""
 
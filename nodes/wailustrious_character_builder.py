@@ -5,7 +5,12 @@ Uses Danbooru tag format for compatibility and consistency.
 """
 from typing import Any, Dict, Tuple
 
+from ..utils.character import CHARACTER_TYPE, CharacterRecord, split_tags
+from ..utils.profiling import profile_node
+from ..utils.tag_vocabulary import check_tags
 
+
+@profile_node
 class WailustriousCharacterBuilder:
     """Generate a single character description with Danbooru tags.
     
@@ -72,11 +77,14 @@ class WailustriousCharacterBuilder:
             },
             "optional": {
                 "special_traits": ("STRING", {"default": ""}),  # Custom Danbooru tags
+                # Validate free-text fields against a local Danbooru tag file (CSV or one tag per line)
+                "tag_file": ("STRING", {"default": ""}),
+                "tag_policy": (["autocorrect", "keep", "drop_unknown"], {"default": "autocorrect"}),
             }
         }
 
-    RETURN_TYPES = ("STRING", "STRING")
-    RETURN_NAMES = ("character_description", "character_type")
+    RETURN_TYPES = ("STRING", "STRING", CHARACTER_TYPE)
+    RETURN_NAMES = ("character_description", "character_type", "character")
     FUNCTION = "build"
     CATEGORY = "KPU Utils"
 
@@ -97,13 +105,54 @@ class WailustriousCharacterBuilder:
         action: str,
         expression: str,
         special_traits: str = "",
-    ) -> Tuple[str, str]:
+        tag_file: str = "",
+        tag_policy: str = "autocorrect",
+    ) -> Tuple[str, str, CharacterRecord]:
         """Build a single character description.
         
         Returns:
-            Tuple of (character_description, character_type).
+            Tuple of (character_description, character_type, character).
             Character type is returned separately so Multi-Character Scene can count them.
+            `character` is the same data as an immutable CharacterRecord with
+            the description pre-split into tags.
+        
+        When `tag_file` is set, body_feature, accessories and special_traits are
+        canonicalized against it and unknown tags handled per `tag_policy`.
         """
+        character = self.make_character(
+            character_type, hair_color, hair_length, hair_style, eye_color, eye_shape,
+            body_type, body_feature, clothing, clothing_color, accessories,
+            pose, action, expression, special_traits, tag_file, tag_policy,
+        )
+        
+        # Return description and character type separately
+        return (character.description, character_type, character)
+    
+    @staticmethod
+    def make_character(
+        character_type: str,
+        hair_color: str,
+        hair_length: str,
+        hair_style: str,
+        eye_color: str,
+        eye_shape: str,
+        body_type: str,
+        body_feature: str,
+        clothing: str,
+        clothing_color: str,
+        accessories: str,
+        pose: str,
+        action: str,
+        expression: str,
+        special_traits: str = "",
+        tag_file: str = "",
+        tag_policy: str = "autocorrect",
+    ) -> CharacterRecord:
+        """Build the CharacterRecord behind `build` (shared with the fused scene node)."""
+        if tag_file.strip():
+            body_feature = check_tags(body_feature, tag_file, tag_policy, label="body_feature")
+            accessories = check_tags(accessories, tag_file, tag_policy, label="accessories")
+            special_traits = check_tags(special_traits, tag_file, tag_policy, label="special_traits")
         
         parts = []
         
@@ -158,5 +207,22 @@ class WailustriousCharacterBuilder:
         # Join all parts
         description = ", ".join(part.strip() for part in parts if part.strip())
         
-        # Return description and character type separately
-        return (description, character_type)
+        return CharacterRecord(
+            character_type=character_type,
+            description=description,
+            tags=split_tags(description),
+            hair_color=hair_color,
+            hair_length=hair_length,
+            hair_style=hair_style,
+            eye_color=eye_color,
+            eye_shape=eye_shape,
+            body_type=body_type,
+            body_feature=body_feature,
+            clothing=clothing,
+            clothing_color=clothing_color,
+            accessories=accessories,
+            pose=pose,
+            action=action,
+            expression=expression,
+            special_traits=special_traits,
+        )
@@ -0,0 +1,145 @@
+"""KPU Wailustrious Fused Scene Node.
+
+Builds up to five characters and the scene prompt in a single node
+execution, replacing the Character Builder x5 -> Multi-Character Scene
+chain.  Output is byte-identical to that chain for the same inputs.
+"""
+import functools
+from typing import Any, Dict, Tuple
+
+from ..utils.character import CharacterRecord
+from ..utils.profiling import profile_node
+from .wailustrious_character_builder import WailustriousCharacterBuilder
+from .wailustrious_multi_character import WailustriousMultiCharacterGenerator
+
+MAX_CHARACTERS = 5
+
+_SCENE_REQUIRED = ("location", "lighting", "time_of_day", "camera_angle", "art_style", "quality_tags")
+_SCENE_OPTIONAL = ("composition", "scene_description", "negative_prompt", "stable_break")
+
+
+def character_defaults() -> Dict[str, str]:
+    """Character Builder field defaults, used for fields a spec line omits."""
+    inputs = WailustriousCharacterBuilder.INPUT_TYPES()
+    defaults = {name: spec[1].get("default", "") for name, spec in inputs["required"].items()}
+    defaults["special_traits"] = ""
+    return defaults
+
+
+CHARACTER_DEFAULTS = character_defaults()
+
+
+def _make_records(specs: str, tag_file: str = "", tag_policy: str = "autocorrect") -> Tuple[CharacterRecord, ...]:
+    """Build one CharacterRecord per line of `specs`.
+
+    Each line holds ``field=value`` pairs separated by ``;``; a leading bare
+    value is the character type, e.g.
+    ``girl; hair_color=pink; accessories=glasses, ribbon``.  Blank lines and
+    lines starting with ``#`` are skipped; omitted fields take the Character
+    Builder defaults.
+
+    Raises:
+        ValueError: On an unknown field or more than MAX_CHARACTERS lines.
+    """
+    defaults = CHARACTER_DEFAULTS
+    make_character = WailustriousCharacterBuilder.make_character
+    records = []
+    for number, line in enumerate(specs.splitlines(), 1):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if len(records) == MAX_CHARACTERS:
+            raise ValueError(f"At most {MAX_CHARACTERS} characters are supported")
+        fields = defaults.copy()
+        for position, item in enumerate(line.split(";")):
+            name, sep, value = item.partition("=")
+            if sep:
+                name = name.strip()
+                if name not in defaults:
+                    raise ValueError(f"Line {number}: unknown field '{name}', expected one of {', '.join(defaults)}")
+                fields[name] = value.strip()
+                continue
+            item = item.strip()
+            if not item:
+                continue
+            if position:
+                raise ValueError(f"Line {number}: expected field=value, got '{item}'")
+            fields["character_type"] = item
+        records.append(make_character(**fields, tag_file=tag_file, tag_policy=tag_policy))
+    return tuple(records)
+
+
+# Records are immutable; only safe to cache while no tag file is involved
+_cached_records = functools.lru_cache(maxsize=64)(_make_records)
+
+
+@profile_node
+class WailustriousFusedScene:
+    """Character Builder x5 + Multi-Character Scene in one node.
+
+    Each line of `characters` describes one character slot (see
+    :func:`_make_records`); the scene inputs match the Multi-Character Scene
+    node.  Skips the five extra node executions (and their cache checks) of
+    the chained graph; built records are memoized per `characters` string,
+    so queue items that only change scene inputs rebuild just the scene.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls) -> Dict[str, Dict[str, Any]]:
+        scene = WailustriousMultiCharacterGenerator.INPUT_TYPES()
+        required = {
+            # One character per line: "girl; hair_color=pink; clothing=maid outfit"
+            "characters": ("STRING", {"default": "girl", "multiline": True}),
+        }
+        required.update((name, scene["required"][name]) for name in _SCENE_REQUIRED)
+        optional = {name: scene["optional"][name] for name in _SCENE_OPTIONAL}
+        optional.update(
+            (name, spec) for name, spec in WailustriousCharacterBuilder.INPUT_TYPES()["optional"].items()
+            if name in ("tag_file", "tag_policy")
+        )
+        return {"required": required, "optional": optional}
+
+    RETURN_TYPES = ("STRING", "STRING", "STRING")
+    RETURN_NAMES = ("positive_prompt", "negative_prompt", "prompt_segments")
+    FUNCTION = "generate"
+    CATEGORY = "KPU Utils"
+
+    def generate(
+        self,
+        characters: str,
+        location: str,
+        lighting: str,
+        time_of_day: str,
+        camera_angle: str,
+        art_style: str,
+        quality_tags: str,
+        composition: str = "",
+        scene_description: str = "",
+        negative_prompt: str = "",
+        stable_break: bool = False,
+        tag_file: str = "",
+        tag_policy: str = "autocorrect",
+    ) -> Tuple[str, str, str]:
+        """Build every character and the scene prompt.
+
+        Returns:
+            Tuple of (positive_prompt, negative_prompt, prompt_segments), as
+            returned by Multi-Character Scene.
+        """
+        if tag_file.strip():
+            # Tag checks depend on the tag file on disk, so records are not cached
+            records = _make_records(characters, tag_file, tag_policy)
+        else:
+            records = _cached_records(characters)
+        return WailustriousMultiCharacterGenerator.compose_scene(
+            [(record.tags, record.character_type) for record in records],
+            location,
+            lighting,
+            time_of_day,
+            camera_angle,
+            art_style,
+            quality_tags,
+            composition,
+            scene_description,
+            negative_prompt,
+            stable_break,
+        )
@@ -3,9 +3,14 @@
 Combines pre-built character descriptions into a full scene prompt.
 Automatically counts 1girl, 2girls, 1boy, etc. at the beginning.
 """
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Optional, Sequence, Tuple
 
+from ..utils.character import CHARACTER_TYPE, CharacterRecord, split_tags
+from ..utils.profiling import profile_node
+from ..utils.prompt_segments import chunked_prompt, join_parts, segment_prompt, segments_json
 
+
+@profile_node
 class WailustriousMultiCharacterGenerator:
     """Combine multiple character descriptions into a complete scene prompt.
     
@@ -53,6 +58,13 @@ class WailustriousMultiCharacterGenerator:
                 "quality_tags": ("STRING", {"default": "high quality, masterpiece, detailed"}),
             },
             "optional": {
+                # Structured characters from Character Builder; override the matching desc/type
+                "character_1": (CHARACTER_TYPE,),
+                "character_2": (CHARACTER_TYPE,),
+                "character_3": (CHARACTER_TYPE,),
+                "character_4": (CHARACTER_TYPE,),
+                "character_5": (CHARACTER_TYPE,),
+                
                 # Character 2
                 "character_2_desc": ("STRING", {"default": ""}),
                 "character_2_type": (["", "girl", "boy", "elf", "demon", "maid", "magical girl", "nun", "witch"], {"default": ""}),
@@ -72,11 +84,12 @@ class WailustriousMultiCharacterGenerator:
                 "composition": ("STRING", {"default": ""}),  # e.g., "centered", "side by side"
                 "scene_description": ("STRING", {"default": ""}),
                 "negative_prompt": ("STRING", {"default": "ugly, deformed, blurry, lowres, watermark, text, extra fingers"}),
+                "stable_break": ("BOOLEAN", {"default": False}),  # BREAK between character block and scene tail
             }
         }
 
-    RETURN_TYPES = ("STRING", "STRING")
-    RETURN_NAMES = ("positive_prompt", "negative_prompt")
+    RETURN_TYPES = ("STRING", "STRING", "STRING")
+    RETURN_NAMES = ("positive_prompt", "negative_prompt", "prompt_segments")
     FUNCTION = "generate"
     CATEGORY = "KPU Utils"
 
@@ -101,37 +114,75 @@ class WailustriousMultiCharacterGenerator:
         composition: str = "",
         scene_description: str = "",
         negative_prompt: str = "",
-    ) -> Tuple[str, str]:
+        stable_break: bool = False,
+        character_1: Optional[CharacterRecord] = None,
+        character_2: Optional[CharacterRecord] = None,
+        character_3: Optional[CharacterRecord] = None,
+        character_4: Optional[CharacterRecord] = None,
+        character_5: Optional[CharacterRecord] = None,
+    ) -> Tuple[str, str, str]:
         """Generate multi-character scene prompt.
         
         Automatically counts and formats character count (1girl, 2girls, 1boy, etc)
         at the beginning of the prompt.
         
+        The character block is the variable segment; camera, composition,
+        setting and style form the stable tail. With `stable_break` the tail
+        is placed in its own CLIP chunk with BREAK.
+        
+        A connected `character_N` record replaces `character_N_desc` and
+        `character_N_type`; its pre-split tags are used without re-parsing.
+        
         Returns:
-            Tuple of (positive_prompt, negative_prompt) as strings.
+            Tuple of (positive_prompt, negative_prompt, prompt_segments),
+            prompt_segments being a JSON list of {text, stable, hash}.
         """
         
-        prompt_parts = []
-        
-        # Collect characters and their types
+        # Collect characters (as tag tuples) and their types
         characters = [
-            (character_1_desc, character_1_type),
-            (character_2_desc, character_2_type),
-            (character_3_desc, character_3_type),
-            (character_4_desc, character_4_type),
-            (character_5_desc, character_5_type),
+            self._character_tags(character_1, character_1_desc, character_1_type),
+            self._character_tags(character_2, character_2_desc, character_2_type),
+            self._character_tags(character_3, character_3_desc, character_3_type),
+            self._character_tags(character_4, character_4_desc, character_4_type),
+            self._character_tags(character_5, character_5_desc, character_5_type),
         ]
         
+        return self.compose_scene(
+            characters, location, lighting, time_of_day, camera_angle, art_style, quality_tags,
+            composition, scene_description, negative_prompt, stable_break,
+        )
+    
+    @classmethod
+    def compose_scene(
+        cls,
+        characters: Sequence[Tuple[Tuple[str, ...], str]],
+        location: str,
+        lighting: str,
+        time_of_day: str,
+        camera_angle: str,
+        art_style: str,
+        quality_tags: str,
+        composition: str = "",
+        scene_description: str = "",
+        negative_prompt: str = "",
+        stable_break: bool = False,
+    ) -> Tuple[str, str, str]:
+        """Build the scene prompt from ``(tags, character_type)`` pairs in slot order.
+        
+        Shared by `generate` and the fused scene node.
+        """
+        prompt_parts = []
+        
         # Count girls and boys
         girls_list = []
         boys_list = []
         
-        for desc, char_type in characters:
-            if desc.strip() and char_type.strip():
+        for tags, char_type in characters:
+            if tags and char_type.strip():
                 if char_type.strip().lower() == "girl":
-                    girls_list.append(desc)
+                    girls_list.append(tags)
                 elif char_type.strip().lower() == "boy":
-                    boys_list.append(desc)
+                    boys_list.append(tags)
         
         # Build character section with explicit prefixes
         # Format: girl1_[features], boy1_[features], boy2_[features]
@@ -142,29 +193,26 @@ class WailustriousMultiCharacterGenerator:
         total_boys = len(boys_list)
         
         if total_girls > 0 or total_boys > 0:
-            count_str = self._format_character_count(total_girls, total_boys)
+            count_str = cls._format_character_count(total_girls, total_boys)
             character_parts.append(count_str)
         
-        # Add each girl with explicit prefix
-        for i, desc in enumerate(girls_list):
-            if desc.strip():
-                # Parse the description and add girl1_ prefix to each feature
-                features = [f.strip() for f in desc.split(",")]
-                prefixed_features = [f"girl{i+1}_{feature}" for feature in features]
-                character_parts.extend(prefixed_features)
-        
-        # Add each boy with explicit prefix
-        for i, desc in enumerate(boys_list):
-            if desc.strip():
-                # Parse the description and add boy1_ prefix to each feature
-                features = [f.strip() for f in desc.split(",")]
-                prefixed_features = [f"boy{i+1}_{feature}" for feature in features]
-                character_parts.extend(prefixed_features)
+        # Add each girl with explicit girl1_ prefix on each feature
+        for i, tags in enumerate(girls_list):
+            prefix = f"girl{i+1}_"
+            character_parts.extend(prefix + tag for tag in tags)
+        
+        # Add each boy with explicit boy1_ prefix on each feature
+        for i, tags in enumerate(boys_list):
+            prefix = f"boy{i+1}_"
+            character_parts.extend(prefix + tag for tag in tags)
         
         # Add character descriptions with prefixes
         if character_parts:
             prompt_parts.extend(character_parts)
         
+        # Everything after the character block is shared across queue items
+        stable_from = len(prompt_parts)
+        
         # Camera angle
         if camera_angle.strip() and camera_angle != "eye level":
             prompt_parts.append(f"{camera_angle} view")
@@ -191,13 +239,26 @@ class WailustriousMultiCharacterGenerator:
             prompt_parts.append(quality_tags)
         
         # Join with commas, preserving newlines in character descriptions
-        positive_prompt = ", ".join(part.strip() for part in prompt_parts if part.strip())
+        segments = segment_prompt(prompt_parts, [(stable_from, len(prompt_parts))])
+        if stable_break:
+            positive_prompt = chunked_prompt(segments)
+        else:
+            positive_prompt = join_parts(prompt_parts)
         
         # Ensure negative prompt is not empty
         if not negative_prompt.strip():
             negative_prompt = "ugly, deformed, blurry, lowres, watermark, text, extra fingers"
         
-        return (positive_prompt, negative_prompt)
+        return (positive_prompt, negative_prompt, segments_json(segments))
+    
+    @staticmethod
+    def _character_tags(
+        record: Optional[CharacterRecord], desc: str, char_type: str
+    ) -> Tuple[Tuple[str, ...], str]:
+        """Return (tags, type) from a record, or by splitting the legacy STRING pair."""
+        if record is not None:
+            return record.tags, record.character_type
+        return split_tags(desc), char_type
     
     @staticmethod
     def _format_character_count(girls: int, boys: int) -> str:
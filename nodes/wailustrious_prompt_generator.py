@@ -5,7 +5,13 @@ optimized for Wailustrious XL model following best practices.
 """
 from typing import Any, Dict, Tuple
 
+from ..utils.profiling import profile_node
+from ..utils.prompt_segments import chunked_prompt, join_parts, segment_prompt, segments_json
+from ..utils.prompt_weights import MERGE_POLICIES, normalize_emphasis
+from ..utils.tag_vocabulary import check_tags
 
+
+@profile_node
 class WailustriousPromptGenerator:
     """Generate structured prompts for Wailustrious XL anime model.
     
@@ -75,11 +81,19 @@ class WailustriousPromptGenerator:
                 "negative_prompt": ("STRING", {"default": "ugly, deformed, blurry, lowres, watermark, text, extra fingers"}),
                 "custom_tags": ("STRING", {"default": ""}),  # Additional custom tags
                 "weight_emphasis": ("STRING", {"default": ""}),  # e.g., "(very beautiful:1.5)"
+                "stable_break": ("BOOLEAN", {"default": False}),  # BREAK around the scene/style block
+                # Validate free-text fields against a local Danbooru tag file (CSV or one tag per line)
+                "tag_file": ("STRING", {"default": ""}),
+                "tag_policy": (["autocorrect", "keep", "drop_unknown"], {"default": "autocorrect"}),
+                # Merge duplicate weighted tags in custom_tags + weight_emphasis ("off" = as typed);
+                # quality_tags and the other fields are not merged against them
+                "emphasis_policy": (["off", *MERGE_POLICIES], {"default": "off"}),
+                "max_weight": ("FLOAT", {"default": 2.0, "min": 0.1, "max": 10.0, "step": 0.05}),
             }
         }
 
-    RETURN_TYPES = ("STRING", "STRING")
-    RETURN_NAMES = ("positive_prompt", "negative_prompt")
+    RETURN_TYPES = ("STRING", "STRING", "STRING")
+    RETURN_NAMES = ("positive_prompt", "negative_prompt", "prompt_segments")
     FUNCTION = "generate"
     CATEGORY = "KPU Utils"
 
@@ -111,12 +125,43 @@ class WailustriousPromptGenerator:
         negative_prompt: str = "",
         custom_tags: str = "",
         weight_emphasis: str = "",
-    ) -> Tuple[str, str]:
+        stable_break: bool = False,
+        tag_file: str = "",
+        tag_policy: str = "autocorrect",
+        emphasis_policy: str = "off",
+        max_weight: float = 2.0,
+    ) -> Tuple[str, str, str]:
         """Generate positive and negative prompts for Wailustrious XL.
         
+        Camera, composition, setting and style (steps 7-9) form the stable
+        segment; character, custom tags and emphasis are variable. With
+        `stable_break` each run is placed in its own CLIP chunk with BREAK.
+        
         Returns:
-            Tuple of (positive_prompt, negative_prompt) as strings.
+            Tuple of (positive_prompt, negative_prompt, prompt_segments),
+            prompt_segments being a JSON list of {text, stable, hash}.
+        
+        When `tag_file` is set, character_type, body_feature, accessories and
+        custom_tags are canonicalized against it and unknown tags handled per
+        `tag_policy`.
+        
+        Unless `emphasis_policy` is "off", custom_tags and weight_emphasis are
+        parsed together, duplicate tags merged by that policy, weights clamped
+        to [0, max_weight] and the result emitted once in place of custom_tags.
+        Only those two fields are merged: ``(masterpiece:1.3)`` in
+        weight_emphasis still repeats ``masterpiece`` from quality_tags.
         """
+        if tag_file.strip():
+            character_type = check_tags(character_type, tag_file, tag_policy, label="character_type")
+            body_feature = check_tags(body_feature, tag_file, tag_policy, label="body_feature")
+            accessories = check_tags(accessories, tag_file, tag_policy, label="accessories")
+            custom_tags = check_tags(custom_tags, tag_file, tag_policy, label="custom_tags")
+        
+        if emphasis_policy != "off":
+            custom_tags = normalize_emphasis(
+                join_parts([custom_tags, weight_emphasis]), emphasis_policy, max_weight=max_weight
+            )
+            weight_emphasis = ""
         
         # Build positive prompt in order of importance
         prompt_parts = []
@@ -181,6 +226,7 @@ class WailustriousPromptGenerator:
             prompt_parts.append(expression)
         
         # 7. Camera & Composition
+        stable_from = len(prompt_parts)
         if camera_angle.strip() and camera_angle != "eye level":
             prompt_parts.append(f"{camera_angle} view")
         
@@ -202,6 +248,8 @@ class WailustriousPromptGenerator:
         if quality_tags.strip():
             prompt_parts.append(quality_tags)
         
+        stable_to = len(prompt_parts)
+        
         # 10. Custom tags
         if custom_tags.strip():
             prompt_parts.append(custom_tags)
@@ -211,15 +259,20 @@ class WailustriousPromptGenerator:
             prompt_parts.append(weight_emphasis)
         
         # Join all parts
-        positive_prompt = ", ".join(part.strip() for part in prompt_parts if part.strip())
+        segments = segment_prompt(prompt_parts, [(stable_from, stable_to)])
+        if stable_break:
+            positive_prompt = chunked_prompt(segments)
+        else:
+            positive_prompt = join_parts(prompt_parts)
         
         # Ensure negative prompt is not empty
         if not negative_prompt.strip():
             negative_prompt = "ugly, deformed, blurry, lowres, watermark, text, extra fingers"
         
-        return (positive_prompt, negative_prompt)
+        return (positive_prompt, negative_prompt, segments_json(segments))
 
 
+@profile_node
 class WailustriousPromptBuilder:
     """Advanced prompt builder with preset combinations for Wailustrious XL."""
 
@@ -254,6 +307,11 @@ class WailustriousPromptBuilder:
                     {"default": "eye level"},
                 ),
                 "modify": ("STRING", {"default": ""}),
+            },
+            "optional": {
+                # Merge duplicate weighted tags in modify ("off" = as typed)
+                "emphasis_policy": (["off", *MERGE_POLICIES], {"default": "off"}),
+                "max_weight": ("FLOAT", {"default": 2.0, "min": 0.1, "max": 10.0, "step": 0.05}),
             }
         }
 
@@ -273,13 +331,22 @@ class WailustriousPromptBuilder:
         "fantasy": "1girl, fantasy warrior, armor, sword, epic pose, dramatic lighting, castle background, heroic expression, high quality, masterpiece, anime illustration",
     }
 
-    def build(self, preset: str, camera_angle: str = "eye level", modify: str = "") -> Tuple[str, ...]:
+    def build(
+        self,
+        preset: str,
+        camera_angle: str = "eye level",
+        modify: str = "",
+        emphasis_policy: str = "off",
+        max_weight: float = 2.0,
+    ) -> Tuple[str, ...]:
         """Build prompt from preset with camera angle and optional modifications.
         
         Args:
             preset: Name of preset configuration
             camera_angle: Camera angle/composition
             modify: Additional tags to append (comma-separated)
+            emphasis_policy: Duplicate-tag merge policy for `modify`, or "off"
+            max_weight: Upper clamp for weights in `modify`
         
         Returns:
             Tuple containing the generated prompt
@@ -292,6 +359,8 @@ class WailustriousPromptBuilder:
             prompt_parts.append(f"{camera_angle} view")
         
         # Add custom modifications
+        if emphasis_policy != "off":
+            modify = normalize_emphasis(modify, emphasis_policy, max_weight=max_weight)
         if modify.strip():
             prompt_parts.append(modify)
         
@@ -1,4 +1,41 @@
 """Utility helpers for comfyui-kpu-utils."""
 from .helpers import dummy_process
+from .character import CHARACTER_TYPE, CharacterRecord, split_tags
+from .grayscale import LUMA_WEIGHTS, grayscale_array, grayscale_bucketed, grayscale_tensor
+from .frame_cache import FrameCache, frame_digest
+from .frames import create_frame_stack, open_frame_stack, stream_frames
+from .profiling import PROFILER, profile_node
+from .prompt_dedup import cluster_prompts, dedup_prompts, minhash_signatures
+from .prompt_segments import chunked_prompt, join_parts, segment_prompt, segments_json
+from .prompt_weights import normalize_emphasis, parse_emphasis
+from .tag_vocabulary import TagVocabulary, check_tags, load_vocabulary
 
-__all__ = ["dummy_process"]
+__all__ = [
+    "dummy_process",
+    "CHARACTER_TYPE",
+    "CharacterRecord",
+    "split_tags",
+    "LUMA_WEIGHTS",
+    "grayscale_array",
+    "grayscale_bucketed",
+    "grayscale_tensor",
+    "FrameCache",
+    "frame_digest",
+    "create_frame_stack",
+    "open_frame_stack",
+    "stream_frames",
+    "PROFILER",
+    "profile_node",
+    "cluster_prompts",
+    "dedup_prompts",
+    "minhash_signatures",
+    "chunked_prompt",
+    "join_parts",
+    "segment_prompt",
+    "segments_json",
+    "normalize_emphasis",
+    "parse_emphasis",
+    "TagVocabulary",
+    "check_tags",
+    "load_vocabulary",
+]
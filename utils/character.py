@@ -0,0 +1,44 @@
+"""Structured character record passed between the Wailustrious nodes.
+
+`WailustriousCharacterBuilder` emits a :class:`CharacterRecord` as the
+``KPU_CHARACTER`` type alongside its STRING outputs.  The record is an
+immutable, tuple-backed value holding the typed fields, the joined
+description and the description already split into tags, so consumers can
+prefix or count tags without re-parsing the string.
+"""
+from typing import NamedTuple, Tuple
+
+CHARACTER_TYPE = "KPU_CHARACTER"
+
+
+def split_tags(description: str) -> Tuple[str, ...]:
+    """Split a comma-separated description into stripped tags.
+
+    Matches the historical ``[f.strip() for f in desc.split(",")]`` parsing,
+    except that a blank description yields no tags.
+    """
+    if not description.strip():
+        return ()
+    return tuple(tag.strip() for tag in description.split(","))
+
+
+class CharacterRecord(NamedTuple):
+    """One character as built by the Character Builder node."""
+
+    character_type: str
+    description: str
+    tags: Tuple[str, ...]
+    hair_color: str = ""
+    hair_length: str = ""
+    hair_style: str = ""
+    eye_color: str = ""
+    eye_shape: str = ""
+    body_type: str = ""
+    body_feature: str = ""
+    clothing: str = ""
+    clothing_color: str = ""
+    accessories: str = ""
+    pose: str = ""
+    action: str = ""
+    expression: str = ""
+    special_traits: str = ""
@@ -0,0 +1,189 @@
+"""Content-addressed LRU cache for per-frame node results.
+
+Frames are keyed by a 128-bit hash of their raw bytes (xxh3 when the
+optional ``xxhash`` package is installed, blake2b otherwise) plus any
+parameters that affect the result.  Entries are kept in memory up to a
+byte budget; least recently used entries are evicted, or spilled to disk
+as ``kpu-<digest>.npy`` files when a spill directory is configured.
+Spilled files have their own byte budget and are deleted least recently
+used first.  Only files matching that name pattern are ever counted or
+deleted, so the spill directory may hold other ``.npy`` files safely.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+# Spill files the cache owns; anything else in the spill directory is left alone
+_SPILL_NAME = re.compile(r"kpu-([0-9a-f]{32})\.npy")
+
+
+def frame_digest(frame: np.ndarray, *params: Any) -> str:
+    """Return a hex digest of `frame`'s bytes, shape, dtype and `params`."""
+    frame = np.ascontiguousarray(frame)
+    hasher = xxhash.xxh3_128() if HAS_XXHASH else hashlib.blake2b(digest_size=16)
+    hasher.update(repr((frame.shape, frame.dtype.str, params)).encode())
+    hasher.update(frame.reshape(-1).view(np.uint8))
+    return hasher.hexdigest()
+
+
+class FrameCache:
+    """Thread-safe LRU of numpy arrays bounded by total bytes."""
+
+    def __init__(
+        self,
+        budget_bytes: int = 512 * 1024 * 1024,
+        spill_dir: str = "",
+        spill_budget_bytes: int = 4096 * 1024 * 1024,
+    ) -> None:
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._spilled: "OrderedDict[str, int]" = OrderedDict()  # key -> file size
+        self._spill_bytes = 0
+        self._lock = threading.Lock()
+        self.budget_bytes = budget_bytes
+        self.spill_budget_bytes = spill_budget_bytes
+        self.spill_dir = ""
+        self._index_spill_dir(spill_dir)
+        self.hits = 0
+        self.spill_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def configure(self, budget_bytes: int, spill_dir: str = "", spill_budget_bytes: Optional[int] = None) -> None:
+        """Change the memory and disk budgets and the spill directory, evicting if needed."""
+        with self._lock:
+            self.budget_bytes = max(0, int(budget_bytes))
+            if spill_budget_bytes is not None:
+                self.spill_budget_bytes = max(0, int(spill_budget_bytes))
+            if spill_dir != self.spill_dir:
+                self._index_spill_dir(spill_dir)
+            self._evict()
+            self._trim_spill()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Return the cached array for `key` or None, promoting it to most recent."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.bytes_saved += value.nbytes
+                return value
+
+            path = self._spill_path(key)
+            if path and os.path.exists(path):
+                value = np.load(path, allow_pickle=False)
+                if key in self._spilled:
+                    self._spilled.move_to_end(key)
+                self.hits += 1
+                self.spill_hits += 1
+                self.bytes_saved += value.nbytes
+                self._insert(key, value)
+                return value
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: np.ndarray) -> None:
+        """Store a private copy of `value` under `key`."""
+        value = np.array(value, copy=True)
+        value.flags.writeable = False
+        with self._lock:
+            self._insert(key, value)
+
+    def clear(self) -> None:
+        """Drop all in-memory entries and spilled files, and reset stats."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self.spill_dir and os.path.isdir(self.spill_dir):
+                for name in os.listdir(self.spill_dir):
+                    if _SPILL_NAME.fullmatch(name):
+                        os.remove(os.path.join(self.spill_dir, name))
+            self._spilled.clear()
+            self._spill_bytes = 0
+            self.hits = self.spill_hits = self.misses = self.bytes_saved = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, hit rate and memory usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "spill_hits": self.spill_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "entries": len(self._entries),
+                "bytes_cached": self._bytes,
+                "budget_bytes": self.budget_bytes,
+                "spill_files": len(self._spilled),
+                "spill_bytes": self._spill_bytes,
+                "spill_budget_bytes": self.spill_budget_bytes,
+            }
+
+    def _insert(self, key: str, value: np.ndarray) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._entries[key] = value
+        self._bytes += value.nbytes
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._entries and self._bytes > self.budget_bytes:
+            key, value = self._entries.popitem(last=False)
+            self._bytes -= value.nbytes
+            path = self._spill_path(key)
+            if path and value.nbytes <= self.spill_budget_bytes and not os.path.exists(path):
+                os.makedirs(self.spill_dir, exist_ok=True)
+                np.save(path, value, allow_pickle=False)
+                size = os.path.getsize(path)
+                self._spilled[key] = size
+                self._spill_bytes += size
+        self._trim_spill()
+
+    def _trim_spill(self) -> None:
+        """Delete least recently used spill files until the disk budget holds."""
+        while self._spilled and self._spill_bytes > self.spill_budget_bytes:
+            key, size = self._spilled.popitem(last=False)
+            self._spill_bytes -= size
+            try:
+                os.remove(self._spill_path(key))
+            except OSError:
+                pass
+
+    def _index_spill_dir(self, spill_dir: str) -> None:
+        """Track spill files already in `spill_dir` (oldest first) so they count toward the budget."""
+        self.spill_dir = spill_dir
+        self._spilled.clear()
+        self._spill_bytes = 0
+        if not spill_dir or not os.path.isdir(spill_dir):
+            return
+        files = []
+        for entry in os.scandir(spill_dir):
+            match = _SPILL_NAME.fullmatch(entry.name)
+            if match and entry.is_file():
+                stat = entry.stat()
+                files.append((stat.st_mtime_ns, match.group(1), stat.st_size))
+        for _, key, size in sorted(files):
+            self._spilled[key] = size
+            self._spill_bytes += size
+
+    def _spill_path(self, key: str) -> Optional[str]:
+        """Return the spill file for `key`, or None if spilling is off or `key` is not a digest."""
+        name = f"kpu-{key}.npy"
+        if not self.spill_dir or not _SPILL_NAME.fullmatch(name):
+            return None
+        return os.path.join(self.spill_dir, name)
@@ -0,0 +1,72 @@
+"""Memory-mapped frame stacks for image sequences larger than RAM.
+
+A frame stack is an ``np.memmap`` of shape ``(N, H, W, C)`` backed by a
+``.npy`` file (shape and dtype read from its header) or a raw file (shape
+and dtype supplied by the caller).  Processing walks the stack in fixed-size
+windows, so memory use stays constant and disk access stays sequential.
+"""
+import os
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+
+def open_frame_stack(
+    path: str,
+    frame_shape: Optional[Tuple[int, ...]] = None,
+    dtype: str = "uint8",
+) -> np.ndarray:
+    """Map an existing frame stack without reading it.
+
+    Args:
+        path: ``.npy`` file, or raw file of back-to-back frames.
+        frame_shape: ``(H, W)`` or ``(H, W, C)`` of one frame; required for
+            raw files and ignored for ``.npy``.
+        dtype: Element type of a raw file.
+
+    Returns:
+        Copy-on-write memmap of shape ``(N, H, W, C)``; writes to it never
+        reach the file.
+    """
+    if path.lower().endswith(".npy"):
+        frames = np.load(path, mmap_mode="c")
+    else:
+        if not frame_shape:
+            raise ValueError("frame_shape is required for raw frame files")
+        dtype = np.dtype(dtype)
+        frame_bytes = int(np.prod(frame_shape)) * dtype.itemsize
+        count = os.path.getsize(path) // frame_bytes
+        frames = np.memmap(path, dtype=dtype, mode="c", shape=(count,) + tuple(frame_shape))
+
+    if frames.ndim == 3:
+        frames = frames[..., np.newaxis]
+    if frames.ndim != 4:
+        raise ValueError(f"Expected (N, H, W[, C]) frames, got shape {frames.shape}")
+    return frames
+
+
+def create_frame_stack(path: str, shape: Tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+    """Create a writable memmap of `shape`, as ``.npy`` or raw by extension."""
+    if path.lower().endswith(".npy"):
+        return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+    return np.memmap(path, dtype=dtype, mode="w+", shape=shape)
+
+
+def stream_frames(
+    src: np.ndarray,
+    dst: np.ndarray,
+    kernel: Callable[[np.ndarray, np.ndarray], None],
+    window: int = 64,
+) -> np.ndarray:
+    """Apply ``kernel(src_window, dst_window)`` over `src` in order.
+
+    Each window is written straight into the matching slice of `dst` and
+    flushed before moving on, so at most one window is resident at a time.
+    """
+    window = max(1, int(window))
+    for start in range(0, len(src), window):
+        stop = min(start + window, len(src))
+        kernel(src[start:stop], dst[start:stop])
+        if isinstance(dst, np.memmap):
+            dst.flush()
+    return dst
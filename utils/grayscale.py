@@ -0,0 +1,233 @@
+"""Grayscale kernels shared by the KPU image nodes.
+
+Both kernels read the colour channels once, accumulate luminance into a
+single ``(..., H, W)`` buffer and write it straight into a preallocated
+output.  Alpha (from an RGBA/LA image or from a separate ComfyUI ``MASK``)
+is written into the same output buffer, so nothing has to be split off and
+recomposited downstream.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import torch
+    HAS_TORCH = True
+except ImportError:
+    HAS_TORCH = False
+
+# ITU-R BT.601 luma coefficients: gray = 0.299*R + 0.587*G + 0.114*B
+LUMA_WEIGHTS = (0.299, 0.587, 0.114)
+
+
+def split_channels(channels: int) -> Tuple[int, Optional[int]]:
+    """Return ``(colour_channels, alpha_index)`` for a channel-last layout.
+
+    RGB -> (3, None), RGBA -> (3, 3), L -> (1, None), LA -> (1, 1).
+    """
+    if channels >= 3:
+        return 3, (3 if channels >= 4 else None)
+    return 1, (1 if channels == 2 else None)
+
+
+def resolve_compute_dtype(dtype: Any, compute_dtype: Any = None) -> Any:
+    """Pick the accumulation dtype for a tensor of `dtype`.
+
+    Reduced-precision and integer inputs accumulate in float32 unless an
+    explicit `compute_dtype` is given; float32/float64 keep their own dtype.
+    """
+    if compute_dtype is not None:
+        return compute_dtype
+    if dtype in (torch.float16, torch.bfloat16) or not dtype.is_floating_point:
+        return torch.float32
+    return dtype
+
+
+def grayscale_tensor(
+    image: Any,
+    keep_alpha: bool = True,
+    mask: Any = None,
+    out: Any = None,
+    compute_dtype: Any = None,
+    chunk_size: int = 0,
+) -> Tuple[Any, Any, Any]:
+    """Convert a channel-last tensor ``(..., H, W, C)`` to grayscale.
+
+    Args:
+        image: Float (or integer) tensor with 1-4 channels.
+        keep_alpha: Keep an alpha channel in the output when one is
+            available (from ``image`` or ``mask``).
+        mask: Optional ComfyUI ``MASK`` (``1 - alpha``) broadcastable to
+            ``(..., H, W)``; used as alpha when ``image`` has none.
+        out: Optional preallocated output of the result shape and any
+            dtype; filled in place instead of allocating a new tensor.
+        compute_dtype: Accumulation dtype, see :func:`resolve_compute_dtype`.
+        chunk_size: Process this many items of the leading dimension at a
+            time (0 = all at once).  Bounds the accumulation buffer when it
+            is wider than the input, e.g. float16 input with float32 compute.
+
+    Returns:
+        Tuple of ``(output, gray, alpha)`` where ``output`` is RGB or RGBA
+        with R=G=B in ``image.dtype`` (or ``out.dtype``), ``gray`` is the
+        luminance plane and ``alpha`` is a view of the input alpha channel
+        (or ``None``).
+    """
+    colour, alpha_idx = split_channels(image.shape[-1])
+    alpha = image[..., alpha_idx] if alpha_idx is not None else None
+    work_dtype = resolve_compute_dtype(image.dtype, compute_dtype)
+
+    with_alpha = keep_alpha and (alpha is not None or mask is not None)
+    out_shape = (*image.shape[:-1], 4 if with_alpha else 3)
+    if out is None:
+        out = torch.empty(out_shape, dtype=image.dtype, device=image.device)
+    elif tuple(out.shape) != out_shape:
+        raise ValueError(f"out has shape {tuple(out.shape)}, expected {out_shape}")
+
+    total = image.shape[0]
+    step = total if chunk_size <= 0 else min(chunk_size, total)
+    # Mask batch dimension (if any) is sliced along with the image
+    batched_mask = mask is not None and mask.dim() == image.dim() - 1 and mask.shape[0] == total
+
+    buffer = None
+    if colour == 3:
+        buffer = torch.empty((step, *image.shape[1:-1]), dtype=work_dtype, device=image.device)
+
+    for start in range(0, total, max(step, 1)):
+        stop = min(start + step, total)
+        src, dst = image[start:stop], out[start:stop]
+        if buffer is not None:
+            gray = buffer[: stop - start]
+            if src.dtype == work_dtype:
+                torch.mul(src[..., 0], LUMA_WEIGHTS[0], out=gray)
+            else:
+                gray.copy_(src[..., 0]).mul_(LUMA_WEIGHTS[0])
+            gray.add_(src[..., 1], alpha=LUMA_WEIGHTS[1])
+            gray.add_(src[..., 2], alpha=LUMA_WEIGHTS[2])
+        else:
+            # Already single channel: the luminance plane is a view of the input
+            gray = src[..., 0]
+
+        dst[..., :3].copy_(gray.unsqueeze(-1))
+        if with_alpha:
+            if alpha is not None:
+                dst[..., 3].copy_(alpha[start:stop])
+            else:
+                chunk_mask = mask[start:stop] if batched_mask else mask
+                if dst.is_floating_point():
+                    dst[..., 3].copy_(chunk_mask).neg_().add_(1.0)
+                else:
+                    # Integer output: scale 1 - mask to the dtype range, as grayscale_array does
+                    dst[..., 3].copy_(torch.sub(1.0, chunk_mask).mul_(torch.iinfo(dst.dtype).max))
+
+    if buffer is None:
+        gray = image[..., 0]
+    elif step == total and buffer.dtype == out.dtype:
+        gray = buffer
+    else:
+        gray = out[..., 0]
+    return out, gray, alpha
+
+
+def grayscale_array(
+    image: np.ndarray,
+    keep_alpha: bool = True,
+    mask: Any = None,
+    out: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """Numpy counterpart of :func:`grayscale_tensor`.
+
+    Accepts ``(H, W)`` or channel-last ``(..., H, W, C)`` arrays.  Integer
+    inputs are accumulated in float32 and truncated back to the input dtype
+    on store; alpha taken from ``mask`` is scaled to the integer range.
+
+    ``out`` may be any preallocated array of the output shape (for example a
+    window of an ``np.memmap``); it is filled in place and returned.
+    """
+    if image.ndim == 2:
+        image = image[..., np.newaxis]
+
+    colour, alpha_idx = split_channels(image.shape[-1])
+    alpha = image[..., alpha_idx] if alpha_idx is not None else None
+
+    if colour == 3:
+        floating = np.issubdtype(image.dtype, np.floating)
+        work_dtype = image.dtype if floating else np.float32
+        weights = np.asarray(LUMA_WEIGHTS, dtype=work_dtype)
+        gray = np.empty(image.shape[:-1], dtype=work_dtype)
+        np.einsum(
+            "...c,c->...", image[..., :3], weights,
+            out=gray, dtype=work_dtype, casting="unsafe",
+        )
+    else:
+        gray = image[..., 0]
+
+    with_alpha = keep_alpha and (alpha is not None or mask is not None)
+    out_shape = image.shape[:-1] + (4 if with_alpha else 3,)
+    if out is None:
+        out = np.empty(out_shape, dtype=image.dtype)
+    elif out.shape != out_shape:
+        raise ValueError(f"out has shape {out.shape}, expected {out_shape}")
+    out[..., :3] = gray[..., np.newaxis]
+    if with_alpha:
+        if alpha is not None:
+            out[..., 3] = alpha
+        else:
+            scale = 1.0
+            if np.issubdtype(image.dtype, np.integer):
+                scale = float(np.iinfo(image.dtype).max)
+            np.multiply(np.subtract(1.0, mask), scale, out=out[..., 3], casting="unsafe")
+    return out, gray, alpha
+
+
+def grayscale_bucketed(
+    images: Sequence[Any],
+    keep_alpha: bool = True,
+    compute_dtype: Any = None,
+    chunk_size: int = 0,
+) -> List[Tuple[Any, Any, Any]]:
+    """Grayscale a list of differently sized images with one kernel call per shape.
+
+    Images (tensors or arrays, ``(H, W, C)`` or ``(B, H, W, C)``) are grouped
+    by trailing shape, dtype and device, concatenated into one contiguous
+    batch per group and converted together.  Results are split back as views
+    of the group output, in the original order and with the original rank.
+
+    Returns:
+        One ``(output, gray, alpha)`` tuple per input, as from
+        :func:`grayscale_tensor` / :func:`grayscale_array`.
+    """
+    buckets: Dict[Tuple[Any, ...], List[int]] = {}
+    for i, image in enumerate(images):
+        is_tensor = HAS_TORCH and isinstance(image, torch.Tensor)
+        device = str(image.device) if is_tensor else "numpy"
+        frame_shape = tuple(image.shape[1:] if image.ndim == 4 else image.shape)
+        buckets.setdefault((frame_shape, str(image.dtype), device), []).append(i)
+
+    results: List[Any] = [None] * len(images)
+    for indices in buckets.values():
+        members = [images[i] for i in indices]
+        is_tensor = HAS_TORCH and isinstance(members[0], torch.Tensor)
+        batched = [image if image.ndim == 4 else image[None] for image in members]
+
+        if is_tensor:
+            batch = batched[0] if len(batched) == 1 else torch.cat(batched)
+            out, gray, alpha = grayscale_tensor(
+                batch, keep_alpha=keep_alpha, compute_dtype=compute_dtype, chunk_size=chunk_size
+            )
+        else:
+            batch = batched[0] if len(batched) == 1 else np.concatenate(batched)
+            out, gray, alpha = grayscale_array(batch, keep_alpha=keep_alpha)
+
+        offset = 0
+        for i, image, part in zip(indices, members, batched):
+            stop = offset + part.shape[0]
+            item = (
+                out[offset:stop],
+                gray[offset:stop],
+                alpha[offset:stop] if alpha is not None else None,
+            )
+            if image.ndim != 4:
+                item = tuple(value[0] if value is not None else None for value in item)
+            results[i] = item
+            offset = stop
+    return results
@@ -0,0 +1,203 @@
+"""Lightweight per-node profiling for comfyui-kpu-utils.
+
+Node classes are decorated with :func:`profile_node`, which wraps their
+``FUNCTION`` method.  Recording is off unless the ``KPU_PROFILE``
+environment variable is set; when off, the wrapper costs one attribute
+check per call.
+
+Environment variables:
+    KPU_PROFILE=1            record wall/CPU time and payload sizes per call
+    KPU_PROFILE_ALLOC=1      also record Python allocation peaks (tracemalloc)
+    KPU_PROFILE_CPROFILE=r   run a fraction ``r`` of calls under cProfile and
+                             keep the reports of the slowest ones
+
+Records go into a fixed-size ring buffer: writers claim a slot from an
+``itertools.count`` (atomic under the GIL) and store a tuple, so the hot
+path takes no lock.  Only the outermost profiled call on a thread is
+recorded; a node function calling another wrapped function (e.g. the list
+node delegating to ``process``) runs the inner call unprofiled.
+"""
+import cProfile
+import functools
+import heapq
+import io
+import itertools
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import torch
+    HAS_TORCH = True
+except ImportError:
+    HAS_TORCH = False
+
+# (node, wall_s, cpu_s, alloc_peak_bytes or None, input_bytes, output_bytes, started_at)
+Record = Tuple[str, float, float, Optional[int], int, int, float]
+
+
+def payload_bytes(value: Any) -> int:
+    """Approximate in-memory size of a node input or output."""
+    if HAS_TORCH and isinstance(value, torch.Tensor):
+        return value.numel() * value.element_size()
+    nbytes = getattr(value, "nbytes", None)  # numpy arrays and memmaps
+    if isinstance(nbytes, int):
+        return nbytes
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(payload_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(payload_bytes(item) for item in value.values())
+    size = getattr(value, "size", None)  # PIL images
+    if isinstance(size, tuple) and hasattr(value, "getbands"):
+        return size[0] * size[1] * len(value.getbands())
+    return 0
+
+
+class NodeProfiler:
+    """Ring buffer of call records plus the slowest sampled cProfile reports."""
+
+    def __init__(self, capacity: int = 4096, top_profiles: int = 5) -> None:
+        self.enabled = os.environ.get("KPU_PROFILE", "") not in ("", "0")
+        self.cprofile_rate = float(os.environ.get("KPU_PROFILE_CPROFILE", "0") or 0)
+        if self.cprofile_rate > 0:
+            self.enabled = True
+        if self.enabled and os.environ.get("KPU_PROFILE_ALLOC", "") not in ("", "0"):
+            tracemalloc.start()
+
+        self.capacity = capacity
+        self.top_profiles = top_profiles
+        self._ring: List[Optional[Record]] = [None] * capacity
+        self._counter = itertools.count()
+        # Only touched on the (rare) sampled path
+        self._profiles: List[Tuple[float, int, str, str]] = []
+        self._profiles_lock = threading.Lock()
+        self._local = threading.local()  # per-thread nesting depth
+
+    def call(self, node: str, func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        """Run ``func(*args, **kwargs)`` and record one entry for `node`.
+
+        Nested calls (already inside a profiled call on this thread) run
+        directly, so they neither add records nor disturb the outer call's
+        allocation peak or cProfile session.
+        """
+        if getattr(self._local, "depth", 0):
+            return func(*args, **kwargs)
+        self._local.depth = 1
+        try:
+            return self._profiled_call(node, func, args, kwargs)
+        finally:
+            self._local.depth = 0
+
+    def _profiled_call(self, node: str, func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        profiler = None
+        if self.cprofile_rate > 0 and random.random() < self.cprofile_rate:
+            profiler = cProfile.Profile()
+
+        result = None
+        started_at = time.time()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            if profiler is not None:
+                result = profiler.runcall(func, *args, **kwargs)
+            else:
+                result = func(*args, **kwargs)
+            return result
+        finally:
+            wall = time.perf_counter() - wall0
+            cpu = time.process_time() - cpu0
+            alloc = tracemalloc.get_traced_memory()[1] - base if tracing else None
+            # args[0] is the node instance
+            input_bytes = payload_bytes(args[1:]) + payload_bytes(kwargs)
+            self.record((node, wall, cpu, alloc, input_bytes, payload_bytes(result), started_at))
+            if profiler is not None:
+                self._keep_profile(node, wall, profiler)
+
+    def record(self, entry: Record) -> None:
+        """Store `entry`, overwriting the oldest record when full."""
+        self._ring[next(self._counter) % self.capacity] = entry
+
+    def records(self) -> List[Record]:
+        """Return a snapshot of the records currently in the ring."""
+        return [entry for entry in list(self._ring) if entry is not None]
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate records per node, slowest total wall time first."""
+        per_node: Dict[str, List[Record]] = {}
+        for entry in self.records():
+            per_node.setdefault(entry[0], []).append(entry)
+
+        nodes = {}
+        for node, entries in per_node.items():
+            walls = sorted(entry[1] for entry in entries)
+            allocs = [entry[3] for entry in entries if entry[3] is not None]
+            calls = len(entries)
+            nodes[node] = {
+                "calls": calls,
+                "wall_total_ms": round(sum(walls) * 1e3, 3),
+                "wall_mean_ms": round(sum(walls) / calls * 1e3, 3),
+                "wall_p95_ms": round(walls[min(calls - 1, int(calls * 0.95))] * 1e3, 3),
+                "wall_max_ms": round(walls[-1] * 1e3, 3),
+                "cpu_total_ms": round(sum(entry[2] for entry in entries) * 1e3, 3),
+                "alloc_peak_max_bytes": max(allocs) if allocs else None,
+                "input_bytes_mean": sum(entry[4] for entry in entries) // calls,
+                "output_bytes_mean": sum(entry[5] for entry in entries) // calls,
+            }
+
+        with self._profiles_lock:
+            profiles = [
+                {"node": node, "wall_ms": round(wall * 1e3, 3), "stats": text}
+                for wall, _, node, text in sorted(self._profiles, reverse=True)
+            ]
+        return {
+            "enabled": self.enabled,
+            "records": sum(node["calls"] for node in nodes.values()),
+            "nodes": dict(sorted(nodes.items(), key=lambda item: -item[1]["wall_total_ms"])),
+            "slowest_profiles": profiles,
+        }
+
+    def reset(self) -> None:
+        """Drop all records and kept cProfile reports."""
+        self._ring = [None] * self.capacity
+        self._counter = itertools.count()
+        with self._profiles_lock:
+            self._profiles = []
+
+    def _keep_profile(self, node: str, wall: float, profiler: cProfile.Profile) -> None:
+        with self._profiles_lock:
+            if len(self._profiles) >= self.top_profiles and wall <= self._profiles[0][0]:
+                return
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(20)
+            entry = (wall, id(profiler), node, stream.getvalue())
+            if len(self._profiles) < self.top_profiles:
+                heapq.heappush(self._profiles, entry)
+            else:
+                heapq.heapreplace(self._profiles, entry)
+
+
+PROFILER = NodeProfiler()
+
+
+def profile_node(cls: type) -> type:
+    """Class decorator wrapping ``cls.FUNCTION`` with :data:`PROFILER`."""
+    name = cls.__name__
+    func = getattr(cls, cls.FUNCTION)
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not PROFILER.enabled:
+            return func(*args, **kwargs)
+        return PROFILER.call(name, func, args, kwargs)
+
+    setattr(cls, cls.FUNCTION, wrapper)
+    return cls
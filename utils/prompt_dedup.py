@@ -0,0 +1,226 @@
+"""Near-duplicate prompt detection with MinHash signatures and LSH banding.
+
+Prompts are shingled at the tag level (comma-separated, case- and
+whitespace-normalized), so prompts that only reorder tags are identical
+sets.  Each distinct tag is hashed once per permutation with a
+multiply-shift hash; a prompt's signature is the column-wise minimum over
+its tags, accumulated with ``np.minimum`` one tag position at a time.
+Signatures are split into bands, prompts sharing a band key are compared
+with their bucket leader (members that fail are regrouped under a new
+leader), and pairs whose estimated Jaccard similarity reaches the threshold
+are merged into clusters by vectorized label propagation.
+"""
+import math
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+# Prompts reduced at a time while building signatures
+_BLOCK_ROWS = 1 << 15
+# Leader rounds per band; bounds the work on buckets crowded by common tags
+_MAX_ROUNDS = 4
+
+
+def choose_bands(threshold: float, num_perm: int) -> int:
+    """Pick the band count whose LSH S-curve midpoint sits just below `threshold`.
+
+    The midpoint ``(1/b) ** (1/r)`` is where a pair becomes more likely than
+    not to share a bucket; keeping it below the threshold favours recall, and
+    candidates are verified against the threshold afterwards.
+    """
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands == 0 and (1.0 / bands) ** (bands / num_perm) <= threshold:
+            return bands
+    return num_perm
+
+
+def _tag_ids(prompts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Tokenize prompts into flat tag ids.
+
+    All prompts are split in one call on their comma-joined text (prompt
+    boundaries follow from each prompt's comma count), and each distinct raw
+    piece is normalized once, so the per-tag work stays in C.
+
+    Returns:
+        Tuple of (tag ids, tag count per prompt, number of distinct tags).
+    """
+    piece_counts = np.fromiter((prompt.count(",") + 1 for prompt in prompts), dtype=np.int64, count=len(prompts))
+    flat = ",".join(prompts).split(",")
+
+    raw = list(dict.fromkeys(flat))
+    raw_index = dict(zip(raw, range(len(raw))))
+    vocab: Dict[str, int] = {}
+    raw_to_tag = np.fromiter(
+        (vocab.setdefault(tag, len(vocab)) if tag else -1 for tag in map(_normalize_tag, raw)),
+        dtype=np.int64,
+        count=len(raw),
+    )
+    ids = raw_to_tag[np.fromiter(map(raw_index.__getitem__, flat), dtype=np.int64, count=len(flat))]
+
+    valid = ids >= 0
+    piece_starts = np.cumsum(piece_counts) - piece_counts
+    # Every prompt has at least one piece, so reduceat segments are never empty
+    lengths = np.add.reduceat(valid.astype(np.int64), piece_starts) if len(prompts) else piece_counts
+    return ids[valid], lengths, len(vocab)
+
+
+def _normalize_tag(tag: str) -> str:
+    """Normalize one tag: lowercase, whitespace collapsed to single spaces."""
+    return " ".join(tag.lower().split())
+
+
+def minhash_signatures(prompts: Sequence[str], num_perm: int = 64, seed: int = 0) -> np.ndarray:
+    """Return an ``(N, num_perm)`` uint32 MinHash signature matrix.
+
+    Prompts without tags get an all-ones (max) signature.
+    """
+    ids, lengths, vocab_size = _tag_ids(prompts)
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+    keys = np.arange(vocab_size, dtype=np.uint64) * _MIX
+    # (U, K) table: one multiply-shift hash per distinct tag and permutation
+    table = np.empty((vocab_size, num_perm), dtype=np.uint32)
+    for k in range(num_perm):
+        table[:, k] = (keys * a[k] + b[k]) >> np.uint64(32)
+
+    signatures = np.full((len(prompts), num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+    starts = np.cumsum(lengths) - lengths
+    # Longest prompts first: the prompts still having a j-th tag are a prefix
+    order = np.argsort(-lengths, kind="stable")
+    order = order[: np.count_nonzero(lengths)]
+
+    for block in range(0, len(order), _BLOCK_ROWS):
+        rows = order[block:block + _BLOCK_ROWS]
+        row_starts = starts[rows]
+        row_lengths = lengths[rows]
+        block_sig = table[ids[row_starts]]
+        for j in range(1, int(row_lengths[0])):
+            count = np.count_nonzero(row_lengths > j)
+            np.minimum(block_sig[:count], table[ids[row_starts[:count] + j]], out=block_sig[:count])
+        signatures[rows] = block_sig
+    return signatures
+
+
+def _band_keys(signatures: np.ndarray, bands: int) -> np.ndarray:
+    """Fold each band of the signature into one uint64 key, shape (bands, N)."""
+    rows = signatures.shape[1] // bands
+    keys = np.zeros((bands, signatures.shape[0]), dtype=np.uint64)
+    for band in range(bands):
+        for column in range(band * rows, (band + 1) * rows):
+            keys[band] = keys[band] * _MIX + signatures[:, column].astype(np.uint64)
+        keys[band] ^= np.uint64(band)
+    return keys
+
+
+def _components(n: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Label connected components; each label is the smallest index in its component."""
+    labels = np.arange(n, dtype=np.int64)
+    while left.size:
+        root_left, root_right = labels[left], labels[right]
+        differ = root_left != root_right
+        if not differ.any():
+            break
+        low = np.minimum(root_left[differ], root_right[differ])
+        np.minimum.at(labels, root_left[differ], low)
+        np.minimum.at(labels, root_right[differ], low)
+        # Pointer jumping until every node points at its root
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+    return labels
+
+
+def cluster_prompts(
+    prompts: Sequence[str],
+    threshold: float = 0.8,
+    num_perm: int = 64,
+    bands: int = 0,
+    seed: int = 0,
+) -> np.ndarray:
+    """Cluster near-duplicate prompts.
+
+    Args:
+        prompts: Prompts to compare.
+        threshold: Minimum estimated tag-set Jaccard similarity to merge.
+        num_perm: Signature length (hash permutations).
+        bands: LSH bands; must divide `num_perm`. 0 picks one from `threshold`.
+        seed: Seed for the hash permutations.
+
+    Returns:
+        Array of cluster labels, one per prompt; the label is the index of the
+        first prompt of the cluster.
+    """
+    if not len(prompts):
+        return np.zeros(0, dtype=np.int64)
+    if bands <= 0:
+        bands = choose_bands(threshold, num_perm)
+    if num_perm % bands:
+        raise ValueError(f"bands ({bands}) must divide num_perm ({num_perm})")
+
+    # Exact duplicates share one signature row
+    unique = list(dict.fromkeys(prompts))
+    first_seen = dict(zip(unique, range(len(unique))))
+    inverse = np.fromiter(map(first_seen.__getitem__, prompts), dtype=np.int64, count=len(prompts))
+    signatures = minhash_signatures(unique, num_perm=num_perm, seed=seed)
+
+    min_agree = math.ceil(threshold * num_perm - 1e-9)
+    left_parts, right_parts = [], []
+    for keys in _band_keys(signatures, bands):
+        # Compare each bucket member with the bucket leader; members that fail
+        # are regrouped among themselves, so dissimilar prompts sharing a
+        # bucket still get compared with each other
+        active = np.arange(len(unique))
+        for _ in range(_MAX_ROUNDS):
+            order = active[np.argsort(keys[active], kind="stable")]
+            sorted_keys = keys[order]
+            group_start = np.ones(len(order), dtype=bool)
+            group_start[1:] = sorted_keys[1:] != sorted_keys[:-1]
+            leader = order[np.maximum.accumulate(np.where(group_start, np.arange(len(order)), 0))]
+            members = order[~group_start]
+            leaders = leader[~group_start]
+            if members.size == 0:
+                break
+            agree = np.count_nonzero(signatures[members] == signatures[leaders], axis=1)
+            keep = agree >= min_agree
+            left_parts.append(members[keep])
+            right_parts.append(leaders[keep])
+            active = members[~keep]
+
+    left = np.concatenate(left_parts) if left_parts else np.zeros(0, dtype=np.int64)
+    right = np.concatenate(right_parts) if right_parts else np.zeros(0, dtype=np.int64)
+    labels = _components(len(unique), left, right)
+
+    # Map back to the original order; label by first original index per cluster
+    unique_first = np.full(len(unique), len(prompts), dtype=np.int64)
+    np.minimum.at(unique_first, inverse, np.arange(len(prompts), dtype=np.int64))
+    cluster_first = np.full(len(unique), len(prompts), dtype=np.int64)
+    np.minimum.at(cluster_first, labels, unique_first)
+    return cluster_first[labels[inverse]]
+
+
+def dedup_prompts(
+    prompts: Sequence[str],
+    threshold: float = 0.8,
+    num_perm: int = 64,
+    bands: int = 0,
+    seed: int = 0,
+) -> Tuple[List[str], List[List[int]]]:
+    """Drop near-duplicates, keeping the first prompt of each cluster.
+
+    Returns:
+        Tuple of (kept prompts in original order, clusters with more than one
+        member as lists of prompt indices).
+    """
+    labels = cluster_prompts(prompts, threshold, num_perm, bands, seed)
+    keep = np.flatnonzero(labels == np.arange(len(labels)))
+    order = np.argsort(labels, kind="stable")
+    bounds = np.flatnonzero(np.diff(labels[order])) + 1
+    members = order.tolist()
+    edges = [0] + bounds.tolist() + [len(members)]
+    clusters = [members[a:b] for a, b in zip(edges, edges[1:]) if b - a > 1]
+    return [prompts[i] for i in keep], clusters
@@ -0,0 +1,73 @@
+"""Split prompts into stable and variable segments.
+
+Prompt nodes build their positive prompt as an ordered list of parts.  The
+scene/style tail of those parts rarely changes between queue items while the
+character block does, so the parts are grouped into consecutive runs flagged
+``stable`` or not, each with a short content hash.  Downstream encoders can
+key a cache on the hash of stable runs, and :func:`chunked_prompt` places
+each run in its own CLIP chunk with ``BREAK`` so that reuse is possible.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+BREAK = " BREAK "
+
+
+def join_parts(parts: Iterable[str]) -> str:
+    """Join prompt parts with commas, dropping empty ones."""
+    return ", ".join(part.strip() for part in parts if part.strip())
+
+
+def segment_hash(text: str) -> str:
+    """Return a short stable hex digest of a segment's text."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def segment_prompt(parts: Sequence[str], stable_ranges: Sequence[Tuple[int, int]]) -> List[Dict[str, Any]]:
+    """Group `parts` into ordered runs of stable / variable parts.
+
+    Args:
+        parts: Prompt parts in output order.
+        stable_ranges: ``[start, stop)`` index ranges of `parts` that are
+            expected to stay identical across queue items.
+
+    Returns:
+        List of ``{"text", "stable", "hash"}`` dicts; runs whose parts are
+        all empty are omitted.
+    """
+    stable = [False] * len(parts)
+    for start, stop in stable_ranges:
+        for i in range(start, min(stop, len(parts))):
+            stable[i] = True
+
+    segments: List[Dict[str, Any]] = []
+    start = 0
+    for i in range(1, len(parts) + 1):
+        if i == len(parts) or stable[i] != stable[start]:
+            text = join_parts(parts[start:i])
+            if text:
+                segments.append({"text": text, "stable": stable[start], "hash": segment_hash(text)})
+            start = i
+    return segments
+
+
+def chunked_prompt(segments: Sequence[Dict[str, Any]]) -> str:
+    """Join segments with ``BREAK`` so each one starts a new CLIP chunk.
+
+    Adjacent segments with the same flag are merged first, so only a change
+    between stable and variable content introduces a break.
+    """
+    runs: List[List[str]] = []
+    previous = None
+    for segment in segments:
+        if segment["stable"] != previous:
+            runs.append([])
+            previous = segment["stable"]
+        runs[-1].append(segment["text"])
+    return BREAK.join(", ".join(run) for run in runs)
+
+
+def segments_json(segments: Sequence[Dict[str, Any]]) -> str:
+    """Serialize segments for a STRING output."""
+    return json.dumps(segments, ensure_ascii=False)
@@ -0,0 +1,218 @@
+"""Parse and normalize weighted emphasis syntax in prompts.
+
+Supported syntax (ComfyUI / A1111 attention):
+    - ``(tags)`` multiplies the weight by 1.1, ``[tags]`` divides it by 1.1
+    - ``(tags:1.3)`` sets the group weight to 1.3
+    - nested groups multiply, e.g. ``((tag))`` is 1.21
+    - ``\\(`` and ``\\)`` are literal parentheses (kept escaped in tag text)
+    - ``BREAK`` is kept in place as a chunk separator
+
+Text is scanned with a regex matching only single brackets, commas and
+escapes, so matching is linear with no backtracking.  Each
+group gets a node (parent, factor) instead of rescaling its tags when a
+``:weight`` suffix shows up at the closing parenthesis; tag weights are
+resolved in one pass at the end.  Stray closing brackets are dropped and
+unclosed groups are closed at the end of the text.
+
+Only comma pieces that are a single group are split into weighted tags; a
+piece mixing plain text and groups (``holding (sword:1.2)``) is kept as
+typed, with its groups intact, so the text is not torn apart.
+"""
+import math
+import re
+from typing import Dict, List, Tuple
+
+BREAK = "BREAK"
+EMPHASIS = 1.1
+MERGE_POLICIES = ("last", "first", "max", "mean")
+
+# Escapes are matched so an escaped bracket is skipped; text runs lie between matches
+_BRACKET = re.compile(r"\\.|[()\[\],]", re.S)
+
+
+def _split_weight(token: str) -> Tuple[str, float]:
+    """Split a trailing ``:number`` off `token`; the weight is NaN if absent."""
+    head, sep, tail = token.rpartition(":")
+    if sep:
+        try:
+            weight = float(tail)
+        except ValueError:
+            weight = math.nan
+        if math.isfinite(weight):
+            return head, weight
+    return token, math.nan
+
+
+def _balance(text: str) -> str:
+    """Drop stray closing brackets from `text` and close unclosed groups at the end."""
+    kept: List[str] = []
+    closers: List[str] = []
+    position = 0
+    for match in _BRACKET.finditer(text):
+        token = match.group()
+        if token == "(" or token == "[":
+            closers.append(")" if token == "(" else "]")
+        elif token == ")" or token == "]":
+            if closers and closers[-1] == token:
+                closers.pop()
+            else:
+                kept.append(text[position:match.start()])
+                position = match.end()
+    if not kept and not closers:
+        return text
+    kept.append(text[position:])
+    kept.extend(reversed(closers))
+    return "".join(kept)
+
+
+class _Piece:
+    """State of the comma piece being read inside one group (or the top level)."""
+
+    __slots__ = ("node", "start", "mark", "tail", "plain", "groups")
+
+    def __init__(self, node: int, start: int, mark: int) -> None:
+        self.node = node
+        self.reset(start, mark)
+
+    def reset(self, start: int, mark: int) -> None:
+        self.start = start  # offset of the piece in the balanced text
+        self.mark = mark  # number of entries emitted before the piece
+        self.tail = start  # offset of the text after the piece start or last group
+        self.plain = False  # non-blank text before the last group
+        self.groups = 0
+
+
+def parse_emphasis(text: str) -> List[Tuple[str, float]]:
+    """Parse `text` into ``(tag, weight)`` pairs in prompt order.
+
+    Tags are the comma-separated pieces with surrounding whitespace
+    stripped; empty pieces are skipped.  A piece that is one group, such as
+    ``(sword:1.2)``, yields the tags inside it.  A piece that mixes plain
+    text and groups, such as ``holding (sword:1.2)``, is kept verbatim as
+    one tag so the text next to the group stays in the same piece.
+    """
+    text = _balance(text)
+    parents = [-1]
+    factors = [1.0]
+    # Each entry is (tag or (start, end) span of verbatim text, group id)
+    entries: List[Tuple[object, int]] = []
+    stack = [_Piece(0, 0, 0)]
+
+    def end_piece(piece: _Piece, end: int) -> None:
+        tag = text[piece.tail:end].strip()
+        if not piece.groups:
+            if tag:
+                entries.append((tag, piece.node))
+        elif piece.groups > 1 or piece.plain or tag:
+            # Mixed piece: replace the tags of its groups with the piece text
+            del entries[piece.mark:]
+            entries.append(((piece.start, end), piece.node))
+
+    for match in _BRACKET.finditer(text):
+        token = match.group()
+        piece = stack[-1]
+        if token == ",":
+            end_piece(piece, match.start())
+            piece.reset(match.end(), len(entries))
+        elif token == "(" or token == "[":
+            piece.plain = piece.plain or bool(text[piece.tail:match.start()].strip())
+            parents.append(piece.node)
+            factors.append(EMPHASIS if token == "(" else 1.0 / EMPHASIS)
+            stack.append(_Piece(len(factors) - 1, match.end(), len(entries)))
+        elif token == ")" or token == "]":
+            # _balance guarantees this closes the innermost group
+            end = match.start()
+            if token == ")":
+                head, weight = _split_weight(text[piece.tail:end])
+                if not math.isnan(weight):
+                    factors[piece.node] = weight
+                    end = piece.tail + len(head)
+            end_piece(piece, end)
+            stack.pop()
+            outer = stack[-1]
+            outer.tail = match.end()
+            outer.groups += 1
+    end_piece(stack[-1], len(text))
+
+    # Parents are created before their children, so one forward pass resolves them
+    weights = factors[:]
+    for node in range(1, len(weights)):
+        weights[node] *= weights[parents[node]]
+    return [
+        (text[tag[0]:tag[1]].strip() if isinstance(tag, tuple) else tag, weights[owner])
+        for tag, owner in entries
+    ]
+
+
+def format_weight(tag: str, weight: float, precision: int = 2) -> str:
+    """Render one tag, wrapping it as ``(tag:weight)`` unless the weight rounds to 1."""
+    weight = round(weight, precision)
+    if tag == BREAK or weight == 1.0:
+        return tag
+    return f"({tag}:{weight:g})"
+
+
+def merge_weights(
+    pairs: List[Tuple[str, float]],
+    policy: str = "last",
+    min_weight: float = 0.0,
+    max_weight: float = 2.0,
+) -> List[Tuple[str, float]]:
+    """Merge duplicate tags and clamp weights.
+
+    Duplicates are matched case-insensitively with whitespace collapsed and
+    keep the position and spelling of their first occurrence.
+
+    Args:
+        pairs: ``(tag, weight)`` pairs from :func:`parse_emphasis`.
+        policy: ``"last"`` or ``"first"`` occurrence wins, ``"max"`` keeps the
+            strongest weight, ``"mean"`` averages them.
+        min_weight: Lower clamp bound.
+        max_weight: Upper clamp bound.
+    """
+    if policy not in MERGE_POLICIES:
+        raise ValueError(f"Unknown merge policy '{policy}', expected one of {MERGE_POLICIES}")
+
+    merged: List[List] = []  # [tag, weight, count]
+    index: Dict[str, int] = {}
+    for tag, weight in pairs:
+        if tag == BREAK:
+            merged.append([tag, 1.0, 1])
+            continue
+        key = " ".join(tag.lower().split())
+        position = index.get(key)
+        if position is None:
+            index[key] = len(merged)
+            merged.append([tag, weight, 1])
+            continue
+        entry = merged[position]
+        if policy == "last":
+            entry[1] = weight
+        elif policy == "max":
+            entry[1] = max(entry[1], weight)
+        elif policy == "mean":
+            entry[1] += weight
+        entry[2] += 1
+
+    result = []
+    for tag, weight, count in merged:
+        if policy == "mean":
+            weight /= count
+        result.append((tag, min(max(weight, min_weight), max_weight)))
+    return result
+
+
+def normalize_emphasis(
+    text: str,
+    policy: str = "last",
+    min_weight: float = 0.0,
+    max_weight: float = 2.0,
+    precision: int = 2,
+) -> str:
+    """Rewrite `text` as a canonical comma-separated weighted prompt.
+
+    Each tag appears once, as plain text at weight 1 or as ``(tag:weight)``
+    otherwise; normalizing the result again returns it unchanged.
+    """
+    pairs = merge_weights(parse_emphasis(text), policy, min_weight, max_weight)
+    return ", ".join(format_weight(tag, weight, precision) for tag, weight in pairs)
@@ -0,0 +1,330 @@
+"""Offline Danbooru tag vocabulary with prefix search and typo correction.
+
+The vocabulary is read from a local tag file, either the CSV layout used by
+tag-autocomplete extensions (``name,category,post_count,"alias1,alias2"``)
+or plain text with one tag per line.  It is stored as a sorted array of
+canonical keys (lowercase, underscores) plus an alias table, and cached
+next to the source as a compact binary file (``<tag file>.kpuidx``) that
+is rebuilt whenever the source changes.
+
+Lookups:
+    - exact / alias: one dict probe
+    - prefix: bisect on the sorted array
+    - correction: candidates one edit away are probed directly; for larger
+      distances the sorted array is walked as an implicit trie, reusing the
+      edit-distance rows of the shared prefix and skipping whole prefixes
+      once every cell exceeds the bound
+"""
+import csv
+import os
+import re
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_MAGIC = b"KPUTAGS1"
+_HEADER = struct.Struct("<8sqqQQQ")  # magic, mtime_ns, size, tag_bytes, tag_count, alias_bytes
+_INDEX_SUFFIX = ".kpuidx"
+
+# Emphasis around a tag is kept as is; only the bare tag text is validated
+_WEIGHT_SUFFIX = re.compile(r":\s*[\d.]+\s*$")
+_SYNTAX = re.compile(r"(?<!\\)[()\[\]{}<>]")
+
+_CACHE: Dict[str, "TagVocabulary"] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def tag_key(tag: str) -> str:
+    """Normalize a tag for lookup: lowercase, unescaped, underscores for spaces."""
+    key = tag.strip().lower().replace("\\(", "(").replace("\\)", ")")
+    return re.sub(r"[\s_]+", "_", key)
+
+
+def _split_emphasis(piece: str) -> Optional[Tuple[str, str, str]]:
+    """Split one comma piece into (opening brackets, tag, weight and closing brackets).
+
+    Returns None for pieces that are not a plain tag inside emphasis, such as
+    ``holding (sword:1.2)``, wildcards or ``<lora:...>``; those pass through.
+    """
+    start = 0
+    while start < len(piece) and piece[start] in "([ ":
+        start += 1
+    end = len(piece)
+    while end > start and piece[end - 1] in ")] " and piece[end - 2:end - 1] != "\\":
+        end -= 1
+    tag = piece[start:end]
+    if ")" in piece[end:]:
+        # ComfyUI only reads a :weight right before a closing parenthesis
+        weight = _WEIGHT_SUFFIX.search(tag)
+        if weight:
+            tag = tag[:weight.start()]
+            end = start + len(tag)
+    if not tag.strip() or _SYNTAX.search(tag):
+        return None
+    return piece[:start], tag.strip(), piece[end:]
+
+
+def display_tag(key: str) -> str:
+    """Render a canonical key in prompt style (spaces instead of underscores).
+
+    Parentheses are escaped so they are not read as emphasis, e.g.
+    ``hatsune_miku_(cosplay)`` becomes ``hatsune miku \\(cosplay\\)``.  Short
+    emoticon-style tags such as ``^_^`` or ``0_0`` keep their underscores.
+    """
+    if len(key) > 3:
+        key = key.replace("_", " ")
+    return key.replace("(", "\\(").replace(")", "\\)")
+
+
+class TagVocabulary:
+    """Sorted tag array with aliases, post counts and bounded-edit lookup."""
+
+    def __init__(self, tags: List[str], counts: array, aliases: Dict[str, int]) -> None:
+        self.tags = tags
+        self.counts = counts
+        self.aliases = aliases
+        self.stamp: Optional[Tuple[int, int]] = None  # (mtime_ns, size) of the source file
+        self._positions = {tag: i for i, tag in enumerate(tags)}
+        self._alphabet = "".join(sorted({ch for tag in tags for ch in tag}))
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def __contains__(self, tag: str) -> bool:
+        return self.canonical(tag) is not None
+
+    @classmethod
+    def from_file(cls, path: str) -> "TagVocabulary":
+        """Parse a CSV or plain-text tag file."""
+        best: Dict[str, int] = {}
+        alias_targets: Dict[str, str] = {}
+        with open(path, "r", encoding="utf-8", newline="") as handle:
+            for row in csv.reader(handle):
+                if not row or not row[0].strip() or row[0].startswith("#"):
+                    continue
+                key = tag_key(row[0])
+                count = int(row[2]) if len(row) > 2 and row[2].strip().isdigit() else 0
+                best[key] = max(count, best.get(key, 0))
+                if len(row) > 3:
+                    for alias in row[3].split(","):
+                        if alias.strip():
+                            alias_targets.setdefault(tag_key(alias), key)
+
+        tags = sorted(best)
+        positions = {tag: i for i, tag in enumerate(tags)}
+        counts = array("q", (best[tag] for tag in tags))
+        aliases = {
+            alias: positions[target]
+            for alias, target in alias_targets.items()
+            if alias not in positions
+        }
+        return cls(tags, counts, aliases)
+
+    @classmethod
+    def load(cls, path: str) -> "TagVocabulary":
+        """Load `path`, using (or refreshing) its binary index cache."""
+        stat = os.stat(path)
+        index_path = path + _INDEX_SUFFIX
+        vocab = cls._read_index(index_path, stat.st_mtime_ns, stat.st_size)
+        if vocab is None:
+            vocab = cls.from_file(path)
+            try:
+                vocab._write_index(index_path, stat.st_mtime_ns, stat.st_size)
+            except OSError as e:
+                print(f"[TagVocabulary] Could not write index {index_path}: {e}")
+        return vocab
+
+    def canonical(self, tag: str) -> Optional[str]:
+        """Return the canonical key for `tag` (directly or via alias), or None."""
+        key = tag_key(tag)
+        if key in self._positions:
+            return key
+        position = self.aliases.get(key)
+        return self.tags[position] if position is not None else None
+
+    def prefix(self, prefix: str, limit: int = 10) -> List[str]:
+        """Return up to `limit` tags starting with `prefix`, most used first."""
+        key = tag_key(prefix)
+        matches = []
+        for i in range(bisect_left(self.tags, key), len(self.tags)):
+            if not self.tags[i].startswith(key):
+                break
+            matches.append(i)
+        matches.sort(key=lambda i: -self.counts[i])
+        return [self.tags[i] for i in matches[:limit]]
+
+    def suggest(self, tag: str, max_distance: int = 2, limit: int = 3) -> List[Tuple[str, int]]:
+        """Return up to `limit` ``(tag, distance)`` pairs within `max_distance`.
+
+        Ordered by distance, then by post count.
+        """
+        key = tag_key(tag)
+        if key in self._positions:
+            return [(key, 0)]
+
+        found = {i: 1 for i in self._within_one(key)} if max_distance >= 1 else {}
+        if max_distance > 1 and len(found) < limit:
+            for i, distance in self._walk(key, max_distance):
+                found.setdefault(i, distance)
+
+        ranked = sorted(found.items(), key=lambda item: (item[1], -self.counts[item[0]]))
+        return [(self.tags[i], distance) for i, distance in ranked[:limit]]
+
+    def _within_one(self, key: str) -> Iterator[int]:
+        """Yield positions of tags exactly one edit away from `key`."""
+        seen = set()
+        splits = [(key[:i], key[i:]) for i in range(len(key) + 1)]
+        candidates = [a + b[1:] for a, b in splits if b]
+        candidates += [a + b[1] + b[0] + b[2:] for a, b in splits if len(b) > 1]
+        candidates += [a + c + b[1:] for a, b in splits if b for c in self._alphabet]
+        candidates += [a + c + b for a, b in splits for c in self._alphabet]
+        for candidate in candidates:
+            position = self._positions.get(candidate)
+            if position is not None and position not in seen and candidate != key:
+                seen.add(position)
+                yield position
+
+    def _walk(self, key: str, max_distance: int) -> Iterator[Tuple[int, int]]:
+        """Walk the sorted array as a trie, yielding ``(position, distance)``."""
+        tags = self.tags
+        width = len(key) + 1
+        rows = [list(range(width))]  # rows[k]: distances for the k-char prefix of `prev`
+        prev = ""
+        i = 0
+        while i < len(tags):
+            word = tags[i]
+            shared = 0
+            limit = min(len(prev), len(word))
+            while shared < limit and prev[shared] == word[shared]:
+                shared += 1
+            del rows[shared + 1:]
+
+            pruned = False
+            for depth in range(shared, len(word)):
+                ch = word[depth]
+                above = rows[depth]
+                row = [depth + 1]
+                for j in range(1, width):
+                    row.append(min(row[j - 1] + 1, above[j] + 1, above[j - 1] + (key[j - 1] != ch)))
+                rows.append(row)
+                if min(row) > max_distance:
+                    # No tag with this prefix can get within bound
+                    prev = word[: depth + 1]
+                    i = bisect_left(tags, prev + "\U0010ffff", i + 1)
+                    pruned = True
+                    break
+            if pruned:
+                continue
+
+            distance = rows[len(word)][-1]
+            if distance <= max_distance:
+                yield i, distance
+            prev = word
+            i += 1
+
+    @classmethod
+    def _read_index(cls, index_path: str, mtime_ns: int, size: int) -> Optional["TagVocabulary"]:
+        try:
+            with open(index_path, "rb") as handle:
+                header = handle.read(_HEADER.size)
+                magic, index_mtime, index_size, tag_bytes, tag_count, alias_bytes = _HEADER.unpack(header)
+                if magic != _MAGIC or index_mtime != mtime_ns or index_size != size:
+                    return None
+                tags = handle.read(tag_bytes).decode("utf-8").split("\n") if tag_count else []
+                counts = array("q")
+                counts.frombytes(handle.read(tag_count * counts.itemsize))
+                alias_keys = handle.read(alias_bytes).decode("utf-8").split("\n") if alias_bytes else []
+                targets = array("I")
+                targets.frombytes(handle.read(len(alias_keys) * targets.itemsize))
+        except (OSError, struct.error, UnicodeDecodeError, ValueError):
+            return None
+        if len(tags) != tag_count or len(targets) != len(alias_keys):
+            return None
+        return cls(tags, counts, dict(zip(alias_keys, targets)))
+
+    def _write_index(self, index_path: str, mtime_ns: int, size: int) -> None:
+        tag_blob = "\n".join(self.tags).encode("utf-8")
+        alias_blob = "\n".join(self.aliases).encode("utf-8")
+        targets = array("I", self.aliases.values())
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "wb") as handle:
+            handle.write(_HEADER.pack(_MAGIC, mtime_ns, size, len(tag_blob), len(self.tags), len(alias_blob)))
+            handle.write(tag_blob)
+            handle.write(self.counts.tobytes())
+            handle.write(alias_blob)
+            handle.write(targets.tobytes())
+        os.replace(tmp_path, index_path)
+
+
+def load_vocabulary(path: str) -> TagVocabulary:
+    """Return the vocabulary for `path`, loading it at most once per process.
+
+    The file is re-read (through its binary index) if it changed on disk.
+    """
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _CACHE_LOCK:
+        vocab = _CACHE.get(path)
+        if vocab is None or vocab.stamp != stamp:
+            vocab = TagVocabulary.load(path)
+            vocab.stamp = stamp
+            _CACHE[path] = vocab
+        return vocab
+
+
+def check_tags(
+    text: str,
+    tag_file: str,
+    policy: str = "autocorrect",
+    max_distance: int = 2,
+    label: str = "tags",
+) -> str:
+    """Validate the comma-separated tags in `text` against `tag_file`.
+
+    Known tags and aliases are canonicalized.  Unknown tags are kept
+    (``"keep"``), replaced by the closest suggestion when one exists
+    (``"autocorrect"``) or removed (``"drop_unknown"``); suggestions are
+    printed either way.  Emphasis brackets and weights around a tag, as in
+    ``(glasses, cat ears:1.2)``, are kept and only the tag text inside is
+    checked; a dropped tag keeps its brackets so groups stay balanced.
+    Pieces mixing text and groups, wildcards and LoRA syntax pass through.
+    Returns `text` unchanged when `tag_file` is empty or `text` is blank.
+    """
+    if not tag_file.strip() or not text.strip():
+        return text
+    try:
+        vocab = load_vocabulary(tag_file.strip())
+    except OSError as e:
+        print(f"[TagVocabulary] Could not load {tag_file}: {e}")
+        return text
+
+    result = []
+    for piece in text.split(","):
+        piece = piece.strip()
+        parts = _split_emphasis(piece) if piece else None
+        if parts is None:
+            if piece:
+                result.append(piece)
+            continue
+        opening, tag, closing = parts
+        canonical = vocab.canonical(tag)
+        if canonical is not None:
+            result.append(opening + display_tag(canonical) + closing)
+            continue
+
+        suggestions = vocab.suggest(tag, max_distance=max_distance)
+        hint = ", ".join(display_tag(name) for name, _ in suggestions) or "no suggestions"
+        if policy == "autocorrect" and suggestions:
+            print(f"[TagVocabulary] {label}: '{tag}' -> '{display_tag(suggestions[0][0])}' ({hint})")
+            result.append(opening + display_tag(suggestions[0][0]) + closing)
+        elif policy == "drop_unknown":
+            print(f"[TagVocabulary] {label}: dropped unknown tag '{tag}' ({hint})")
+            brackets = opening.strip() + re.sub(r"[^)\]]", "", closing)
+            if brackets:
+                result.append(brackets)
+        else:
+            print(f"[TagVocabulary] {label}: unknown tag '{tag}' ({hint})")
+            result.append(piece)
+    return ", ".join(result)